@@ -1,3 +1,5 @@
+from src.startup_report import startup_report  # First import: the startup clock starts here
+import os
 import logging
 import time
 import threading
@@ -7,6 +9,12 @@ from apscheduler.triggers.interval import IntervalTrigger
 from src.api import app
 from src.task_manager import task_manager, generate_task_id, create_task_info
 from src.airtable import get_active_hashtags
+from src.driver_pool import driver_pool
+from src.task_journal import get_task_journal
+from src.airtable_writer import airtable_writer, airtable_upsert_writer
+from src.profile_replica import get_profile_replica, PROFILE_REPLICA_SYNC_MINUTES
+from src.username_index import get_username_index, USERNAME_INDEX_SYNC_MINUTES
+startup_report.mark("imports")
 
 # Configure comprehensive logging
 logging.basicConfig(
@@ -74,6 +82,9 @@ def cleanup_old_tasks():
         cleaned_count = task_manager.cleanup_old_tasks(max_age_hours=24)
         if cleaned_count > 0:
             logger.info(f"🧹 Cleanup job: Removed {cleaned_count} old tasks")
+        pruned_count = get_task_journal().prune(max_age_hours=24)
+        if pruned_count > 0:
+            logger.info(f"🧹 Cleanup job: Pruned {pruned_count} completed/failed task checkpoints")
     except Exception as e:
         logger.error(f"Error in cleanup job: {e}")
 
@@ -112,6 +123,38 @@ scheduler.add_job(
 )
 logger.info("💓 Health monitor scheduled - runs every 30 minutes")
 
+# Profile replica sync
+def sync_profile_replica():
+    """Pull profiles changed in Airtable into the local replica the read endpoints use"""
+    try:
+        get_profile_replica().sync_due()
+    except Exception as e:
+        logger.error(f"Error syncing profile replica: {e}")
+
+scheduler.add_job(
+    sync_profile_replica,
+    IntervalTrigger(minutes=PROFILE_REPLICA_SYNC_MINUTES),
+    id="profile_replica_sync",
+    name="Profile Replica Sync"
+)
+logger.info(f"🗄️ Profile replica sync scheduled - runs every {PROFILE_REPLICA_SYNC_MINUTES} minutes")
+
+# Username index sync
+def sync_username_index():
+    """Pull usernames changed in Airtable into the shared index, in full once a day"""
+    try:
+        get_username_index().sync()
+    except Exception as e:
+        logger.error(f"Error syncing username index: {e}")
+
+scheduler.add_job(
+    sync_username_index,
+    IntervalTrigger(minutes=USERNAME_INDEX_SYNC_MINUTES),
+    id="username_index_sync",
+    name="Username Index Sync"
+)
+logger.info(f"🗂️ Username index sync scheduled - runs every {USERNAME_INDEX_SYNC_MINUTES} minutes")
+
 # Graceful shutdown handler
 def shutdown_handler():
     """Handle graceful shutdown"""
@@ -136,6 +179,13 @@ def shutdown_handler():
             logger.warning(f"⚠️ {remaining} tasks still running after timeout")
         else:
             logger.info("✅ All tasks completed")
+
+    # Close idle pooled browsers
+    driver_pool.shutdown()
+
+    # Send profiles still buffered for Airtable
+    airtable_writer.shutdown()
+    airtable_upsert_writer.shutdown()
     
     logger.info("👋 Shutdown complete")
 
@@ -1,55 +1,194 @@
 import os
-from pyairtable import Api
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from requests import Session
 from dotenv import load_dotenv
+
+from src.startup_report import startup_report
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Airtable config
 AIRTABLE_PAT = os.getenv("AIRTABLE_PAT")
 BASE_ID = "appdKQ8h63VIsBEAj"  # Replace with your base ID
 TABLE_NAME = "tiktok"
 HASHTAGS_TABLE_NAME = "hashtags"
 
-api = Api(AIRTABLE_PAT)
-table = api.table(BASE_ID, TABLE_NAME)
-hashtags_table = api.table(BASE_ID, HASHTAGS_TABLE_NAME)
-print("Connected to Airtable Table:", table.name)
-print("Connected to Hashtags Table:", hashtags_table.name)
+# Rate limiting (Airtable allows 5 requests per second per base)
+AIRTABLE_RATE_LIMIT = float(os.getenv("AIRTABLE_RATE_LIMIT", "5"))  # Requests per second
+AIRTABLE_BURST = int(os.getenv("AIRTABLE_BURST", "1"))  # Requests allowed back to back before spacing kicks in
+AIRTABLE_429_RETRIES = int(os.getenv("AIRTABLE_429_RETRIES", "3"))
+AIRTABLE_429_BACKOFF = 30.0  # Airtable's documented lockout when no Retry-After is sent
+SYNC_OVERLAP_SECONDS = 60  # Incremental pulls re-read this much history to cover clock skew
 
 
-def save_profile_to_airtable(profile_data: dict):
+class TokenBucket:
     """
-    Save a scraped profile to Airtable.
-    
-    profile_data: {
-        "Name": str,
-        "Username": str,
-        "Followers": int,
-        "Profile URL": str,
-        ...
-    }
+    Thread-safe token bucket shared by every Airtable request in the process.
+
+    Callers reserve their slot under the lock, so requests go out in arrival
+    order at `rate` per second (with up to `burst` back to back). pause() holds
+    everyone back after a 429, including callers already waiting for a slot.
     """
+
+    def __init__(self, rate: float = AIRTABLE_RATE_LIMIT, burst: int = AIRTABLE_BURST):
+        self.interval = 1.0 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "waited_requests": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0,
+                      "rate_limited": 0}
+
+    def acquire(self) -> float:
+        """Block until the caller may send a request; returns the seconds waited"""
+        started = time.monotonic()
+        with self.lock:
+            slot = max(self.next_slot, started)
+            wait = max(0.0, slot - self.tolerance - started)
+            self.next_slot = slot + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+        # Honour a pause that started while this caller was waiting for its slot
+        while True:
+            with self.lock:
+                remaining = self.paused_until - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(remaining)
+
+        waited = time.monotonic() - started
+        with self.lock:
+            self.stats["requests"] += 1
+            if waited > 0.001:
+                self.stats["waited_requests"] += 1
+                self.stats["total_wait_seconds"] += waited
+                self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Stop all requests for `seconds`, e.g. after a 429"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.next_slot = max(self.next_slot, self.paused_until + self.tolerance)
+            self.stats["rate_limited"] += 1
+
+    def get_statistics(self) -> dict:
+        """Get request and wait-time counters"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats["average_wait_seconds"] = stats["total_wait_seconds"] / max(stats["requests"], 1)
+        return stats
+
+
+def retry_after_seconds(response) -> float:
+    """Seconds to back off after a 429, from Retry-After when Airtable sends it"""
     try:
-        record = table.create(profile_data)
-        print(f"✅ Saved to Airtable: {profile_data['Username']}")
-        return record
-    except Exception as e:
-        print(f"❌ Error saving to Airtable: {e}")
+        return max(float(response.headers.get("Retry-After")), 0.0)
+    except (TypeError, ValueError):
+        return AIRTABLE_429_BACKOFF
+
+
+class RateLimitedSession(Session):
+    """
+    requests Session that sends every Airtable call through the shared
+    TokenBucket and retries 429 responses after the bucket's pause.
+    """
+
+    def __init__(self, bucket: TokenBucket, max_retries: int = AIRTABLE_429_RETRIES):
+        super().__init__()
+        self.bucket = bucket
+        self.max_retries = max_retries
+
+    def request(self, method, url, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = super().request(method, url, *args, **kwargs)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            delay = retry_after_seconds(response)
+            logger.warning(f"⚠️ Airtable rate limit hit, pausing all requests for {delay:.1f}s "
+                           f"(retry {attempt + 1}/{self.max_retries})")
+            self.bucket.pause(delay)
+        return response
+
+
+rate_limiter = TokenBucket()
+
+_api = None
+_tables = {}
+_api_lock = threading.Lock()
+
+
+def build_api(token: str = None):
+    """Airtable client whose requests all go through the shared rate limiter"""
+    from pyairtable import Api
+
+    api = Api(token if token is not None else AIRTABLE_PAT, retry_strategy=None)
+    session = RateLimitedSession(rate_limiter)
+    # Api.__init__ put the Authorization header on its own session; keep it on ours
+    session.headers.update(api.session.headers)
+    api.session = session
+    return api
+
+
+def get_api():
+    """Get the process-wide Airtable client, building it (and importing pyairtable) on first use"""
+    global _api
+    with _api_lock:
+        if _api is None:
+            with startup_report.measure("Airtable client"):
+                _api = build_api()
+            logger.info(f"Connected to Airtable base {BASE_ID} (tables: {TABLE_NAME}, {HASHTAGS_TABLE_NAME})")
+        return _api
+
+
+def _get_table(name: str):
+    api = get_api()
+    with _api_lock:
+        if name not in _tables:
+            _tables[name] = api.table(BASE_ID, name)
+        return _tables[name]
+
+
+def get_table():
+    """Get the profiles table"""
+    return _get_table(TABLE_NAME)
+
+
+def get_hashtags_table():
+    """Get the hashtags table"""
+    return _get_table(HASHTAGS_TABLE_NAME)
+
+
+def modified_since_timestamp(last_synced: float) -> str:
+    """ISO 8601 time to pull changes from after a sync at `last_synced`, SYNC_OVERLAP_SECONDS early"""
+    since = datetime.fromtimestamp(last_synced - SYNC_OVERLAP_SECONDS, tz=timezone.utc)
+    return since.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def modified_since_formula(modified_since: str = None):
+    """Formula matching records created or modified after an ISO 8601 time, or None for every record"""
+    if not modified_since:
         return None
-    
-def get_existing_usernames():
+    return f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{modified_since}'))"
+
+def get_existing_usernames(modified_since: str = None):
     """
-    Fetch all usernames from the Airtable table.
-    Returns a Python list of usernames.
+    Fetch the Username of every record (or, with modified_since, of records
+    created or modified after that ISO 8601 time). Only the Username field is
+    downloaded; createdTime comes with every record.
+
+    Returns a list of dicts: {"username", "created_time"}
     """
-    # Fetch all records
-    records = table.all()    
-    # Extract Username field values
-    usernames = []
-    for record in records:
-        username = record["fields"].get("Username")
-        if username:  # avoid None values
-            usernames.append(username)   
-    return usernames
+    records = get_table().all(fields=["Username"], formula=modified_since_formula(modified_since))
+    return [
+        {"username": record["fields"]["Username"], "created_time": record.get("createdTime")}
+        for record in records if record["fields"].get("Username")
+    ]
 
 def get_active_hashtags():
     """
@@ -61,7 +200,7 @@ def get_active_hashtags():
     """
     try:
         # Fetch all records from hashtags table
-        records = hashtags_table.all()
+        records = get_hashtags_table().all()
         
         # Filter for only active hashtags
         active_hashtags = []
@@ -80,20 +219,3 @@ def get_active_hashtags():
     except Exception as e:
         print(f"❌ Error fetching hashtags from Airtable: {e}")
         return []
-
-if __name__ == "__main__":
-    from schemas import Profile
-    # Example profile data
-    profile = Profile(
-    Username="John Doe",
-    Bio="@johndoe",
-    Followers=48700,
-    Likes=9818,
-    Profile_URL="https://www.tiktok.com/@johndoe",
-    Image_URL="https://example.com/image.jpg",
-    Hashtag=", ".join(["travel", "funnyvideos"]),   # Multiple hashtags
-    Blacklist=False,
-    Source="Tiktok",
-    Country="USA"
-)
-    save_profile_to_airtable(profile.dict())
@@ -0,0 +1,246 @@
+import os
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Hashable, List, Optional
+
+from src.airtable import get_table
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+AIRTABLE_BATCH_SIZE = min(int(os.getenv("AIRTABLE_BATCH_SIZE", "10")), 10)  # Airtable accepts at most 10 per request
+AIRTABLE_FLUSH_SECONDS = float(os.getenv("AIRTABLE_FLUSH_SECONDS", "2"))  # Max age of a buffered record
+AIRTABLE_BUFFER_SIZE = int(os.getenv("AIRTABLE_BUFFER_SIZE", "100"))  # Records buffered before submit() blocks
+AIRTABLE_WRITE_RETRIES = int(os.getenv("AIRTABLE_WRITE_RETRIES", "3"))
+RETRY_BACKOFF_SECONDS = 1.0
+
+_FLUSH = object()
+_STOP = object()
+
+
+class PendingRecord:
+    """A buffered record and the callback to run once it is written"""
+
+    def __init__(self, fields: dict, callback: Optional[Callable], seq: int, tag: Optional[Hashable] = None):
+        self.fields = fields
+        self.callback = callback
+        self.seq = seq
+        self.tag = tag
+        self.queued_at = time.time()
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and network failures are retried; invalid records are not"""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+class AirtableBatchWriter:
+    """
+    Background writer that saves records with batch_create, 10 per request.
+
+    submit() only buffers the record, so scrapers never wait on Airtable. A
+    batch is sent once it is full or its oldest record is AIRTABLE_FLUSH_SECONDS
+    old, whichever comes first. Failed batches are retried with backoff; a batch
+    that still fails (e.g. one invalid record) is written record by record so
+    the rest of it is not lost. Every record's callback receives the created
+    Airtable record, or None if it could not be saved.
+
+    With key_fields the writer uses batch_upsert instead: records matching an
+    existing row on those fields update it, the others are created.
+
+    Without target_table the writer uses the profiles table, resolved on the
+    first write so the Airtable client is not built at import time.
+    """
+
+    def __init__(self, target_table=None, batch_size: int = AIRTABLE_BATCH_SIZE,
+                 flush_seconds: float = AIRTABLE_FLUSH_SECONDS, buffer_size: int = AIRTABLE_BUFFER_SIZE,
+                 retries: int = AIRTABLE_WRITE_RETRIES, key_fields: Optional[List[str]] = None):
+        self.target_table = target_table
+        self.key_fields = key_fields
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.retries = retries
+        self.buffer = queue.Queue(maxsize=buffer_size)
+        self.condition = threading.Condition()
+        self.submitted = 0
+        self.completed = 0
+        self.pending_by_tag: Dict[Hashable, int] = {}
+        self.thread = None
+        self.stopped = False
+        self.stats: Dict[str, int] = {"requests": 0, "records_saved": 0, "records_failed": 0, "retries": 0}
+
+    @property
+    def table(self):
+        return self.target_table if self.target_table is not None else get_table()
+
+    def _ensure_started(self) -> None:
+        with self.condition:
+            if self.thread is None and not self.stopped:
+                name = "AirtableUpsertWriter" if self.key_fields else "AirtableWriter"
+                self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+                self.thread.start()
+
+    def submit(self, fields: dict, callback: Optional[Callable] = None, tag: Optional[Hashable] = None) -> None:
+        """
+        Buffer a record for the next batch; blocks only while the buffer is full.
+        callback(record) is called from the writer thread once the batch is sent.
+        tag groups the records of one caller (e.g. a scrape task) for flush(tag=...).
+        """
+        with self.condition:
+            self.submitted += 1
+            item = PendingRecord(fields, callback, self.submitted, tag)
+            if tag is not None:
+                self.pending_by_tag[tag] = self.pending_by_tag.get(tag, 0) + 1
+            stopped = self.stopped
+
+        if stopped:
+            # Writer already shut down: save inline rather than drop the record
+            self._write([item])
+            return
+
+        self._ensure_started()
+        self.buffer.put(item)
+
+    def flush(self, timeout: Optional[float] = None, tag: Optional[Hashable] = None) -> bool:
+        """
+        Send everything submitted so far and wait until it is written. With a
+        tag, wait only for the records submitted with that tag, so one task
+        finishing does not wait on the saves of every other running task.
+        Returns False if `timeout` expired first.
+        """
+        with self.condition:
+            if tag is None:
+                target = self.submitted
+                done = lambda: self.completed >= target
+            else:
+                done = lambda: not self.pending_by_tag.get(tag)
+            if done():
+                return True
+            running = self.thread is not None and self.thread.is_alive()
+
+        if running:
+            self.buffer.put(_FLUSH)
+        with self.condition:
+            return self.condition.wait_for(done, timeout)
+
+    def shutdown(self, timeout: Optional[float] = 30) -> None:
+        """Flush the buffer and stop the writer thread"""
+        with self.condition:
+            thread, self.stopped = self.thread, True
+        if thread is None:
+            return
+        self.buffer.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"⚠️ Airtable writer still busy after {timeout}s, {self.buffer.qsize()} records unsaved")
+        else:
+            logger.info("🧹 Airtable writer flushed and stopped")
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self.buffer.get()
+            if item is _STOP:
+                break
+            if item is _FLUSH:
+                continue
+
+            batch = [item]
+            deadline = item.queued_at + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                try:
+                    # Past the deadline (e.g. a backlog built up), still take what is already buffered
+                    item = self.buffer.get(timeout=remaining) if remaining > 0 else self.buffer.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _FLUSH:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+        # Drain whatever was submitted after the stop was requested
+        leftovers = []
+        while True:
+            try:
+                item = self.buffer.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, PendingRecord):
+                leftovers.append(item)
+        for start in range(0, len(leftovers), self.batch_size):
+            self._write(leftovers[start:start + self.batch_size])
+
+    def _write(self, batch: List[PendingRecord]) -> None:
+        records = self._create_batch(batch)
+        if records is None:
+            logger.warning(f"⚠️ Batch of {len(batch)} failed, saving records one by one")
+            records = [self._create_one(item) for item in batch]
+
+        for item, record in zip(batch, records):
+            if item.callback:
+                try:
+                    item.callback(record)
+                except Exception as e:
+                    logger.error(f"❌ Error in Airtable save callback: {e}")
+
+        with self.condition:
+            self.stats["records_saved"] += sum(1 for r in records if r)
+            self.stats["records_failed"] += sum(1 for r in records if not r)
+            self.completed = max(self.completed, max(item.seq for item in batch))
+            for item in batch:
+                if item.tag is not None:
+                    self.pending_by_tag[item.tag] -= 1
+                    if not self.pending_by_tag[item.tag]:
+                        del self.pending_by_tag[item.tag]
+            self.condition.notify_all()
+
+    def _create_batch(self, batch: List[PendingRecord]):
+        for attempt in range(self.retries + 1):
+            try:
+                with self.condition:
+                    self.stats["requests"] += 1
+                if self.key_fields:
+                    result = self.table.batch_upsert([{"fields": item.fields} for item in batch], self.key_fields)
+                    records = result["records"]
+                else:
+                    records = self.table.batch_create([item.fields for item in batch])
+                logger.info(f"✅ Saved {len(records)} profiles to Airtable in one request")
+                return records
+            except Exception as e:
+                if attempt == self.retries or not is_retryable(e):
+                    logger.error(f"❌ Error saving batch to Airtable: {e}")
+                    return None
+                delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+                logger.warning(f"⚠️ Airtable batch failed ({e}), retrying in {delay:.0f}s")
+                with self.condition:
+                    self.stats["retries"] += 1
+                time.sleep(delay)
+
+    def _create_one(self, item: PendingRecord):
+        try:
+            with self.condition:
+                self.stats["requests"] += 1
+            if self.key_fields:
+                return self.table.batch_upsert([{"fields": item.fields}], self.key_fields)["records"][0]
+            return self.table.create(item.fields)
+        except Exception as e:
+            logger.error(f"❌ Error saving {item.fields.get('Username')} to Airtable: {e}")
+            return None
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Get buffer size and lifetime counters"""
+        with self.condition:
+            return {"buffered": self.submitted - self.completed, **self.stats}
+
+
+# Global Airtable writer instances
+airtable_writer = AirtableBatchWriter()
+airtable_upsert_writer = AirtableBatchWriter(key_fields=["Username"])  # Refreshes of known profiles
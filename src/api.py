@@ -1,27 +1,73 @@
+import io
+import os
+import csv
+import json
 import logging
 import time
+import threading
 import traceback
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from typing import Iterator, List, Optional
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from src.schemas import (
     ScraperRequest, ScraperResponse, TaskStatus, ActiveTasksResponse,
-    ActiveHashtagsResponse, HealthResponse, LLMQueryResponse, AIQueryRequest,
-    ProfileFilters
+    ActiveHashtagsResponse, HealthResponse, LLMQueryResponse, AIQueryRequest
 )
-from src.airtable import get_active_hashtags, table
+from src.airtable import get_active_hashtags, get_table, rate_limiter
 from src.task_manager import task_manager, generate_task_id, create_task_info
-from src.llm_query import parse_query_to_filters
-from src.tikTok_Scraper import scrape_tiktok_profiles
+from src.llm_query import aparse_query, get_query_cache
+from src.query_parser import MAX_LIMIT
+from src.tikTok_Scraper import scrape_tiktok_profiles, PROFILE_TABS, REFRESH_KNOWN_PROFILES
+from src.driver_pool import driver_pool
+from src.task_journal import get_task_journal, RESUMABLE_STATUSES
+from src.username_index import get_username_index
+from src.airtable_writer import airtable_writer, airtable_upsert_writer
+from src.profile_replica import get_profile_replica, AGGREGATE_DIMENSIONS, PROFILE_STATS_MAX_WINDOW_HOURS
+from src.startup_report import startup_report
+from src.endpoint_guard import (
+    profiles_guard, search_guard, stats_guard, hashtags_guard, tasks_guard, llm_guard, ENDPOINT_GUARDS
+)
 
 logger = logging.getLogger(__name__)
 
+# Profile export
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CSV_FIELDS = ["Username", "Bio", "Followers", "Likes", "Profile_URL", "Image_URL", "Hashtag", "Country",
+                     "Source", "Blacklist"]  # Columns when no fields are requested
+EXPORT_AIRTABLE_PAGE_SIZE = 100  # Airtable's maximum page size
+EXPORT_CHUNK_BYTES = 64 * 1024  # Output is sent in chunks of about this size
+
+RESUME_INTERRUPTED_TASKS = os.getenv("RESUME_INTERRUPTED_TASKS", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start background services and re-queue interrupted tasks once they can run,
+    then log how long the process took to get from its first import to serving requests
+    """
+    start_background_services()
+    if RESUME_INTERRUPTED_TASKS:
+        # Pick up tasks a crash or restart cut off, from their last checkpoint
+        try:
+            resumed_count = resume_interrupted_tasks()
+            if resumed_count > 0:
+                logger.info(f"⏯️ Resumed {resumed_count} interrupted tasks")
+        except Exception as e:
+            logger.error(f"Error resuming interrupted tasks: {e}")
+    startup_report.mark("app ready")
+    startup_report.log()
+    yield
+
 # Create FastAPI app
 app = FastAPI(
     title="TikTok Scraper API",
     description="Multithreaded TikTok profile scraper with LLM integration",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -36,22 +82,34 @@ app.add_middleware(
 # Global variables for queue processing
 scraper_queue = []
 max_concurrent_threads = 3
+background_services_started = False
+background_services_lock = threading.Lock()
 
 
-def scraper_worker(task_id: str, hashtag: str, num_profiles: int):
+def scraper_worker(task_id: str, hashtag: str, num_profiles: int, profile_tabs: int = PROFILE_TABS,
+                   resume: bool = False, refresh: bool = REFRESH_KNOWN_PROFILES):
     """
-    Worker function that runs in its own thread to execute scraping
+    Worker function that runs in its own thread to execute scraping.
+    The task checks a driver out of the pool here, so a cold Chrome start only
+    delays this task and not the dispatch of the ones queued behind it; the
+    driver is returned to the pool when the task ends.
+    Progress is journaled under task_id; resume continues from its checkpoint.
     """
     thread_name = threading.current_thread().name
     logger.info(f"[{thread_name}] Starting scraper task {task_id} for hashtag: {hashtag}")
+    driver = None
     
     try:
+        # Take a warm browser from the pool, launching one if none is idle
+        driver = driver_pool.checkout()
+
         # Update task status
         task_manager.update_task_status(task_id, 'running')
         
         # Execute scraper
         logger.info(f"[{thread_name}] Executing scraper for hashtag: {hashtag}")
-        scrape_tiktok_profiles(base_hashtag=hashtag, num_profiles=num_profiles)
+        scrape_tiktok_profiles(base_hashtag=hashtag, num_profiles=num_profiles, driver=driver,
+                               profile_tabs=profile_tabs, task_id=task_id, resume=resume, refresh=refresh)
         
         # Mark as completed
         task_manager.update_task_status(task_id, 'completed')
@@ -64,6 +122,9 @@ def scraper_worker(task_id: str, hashtag: str, num_profiles: int):
         task_manager.update_task_status(task_id, 'failed', str(e))
     
     finally:
+        if driver is not None:
+            driver_pool.checkin(driver)
+
         # Clean up thread tracking
         task_manager.remove_active_thread(task_id)
         logger.info(f"[{thread_name}] Thread cleanup completed for task {task_id}")
@@ -84,10 +145,11 @@ def process_scraper_queue():
                 
                 if queue_item:
                     # Start new thread
-                    import threading
                     thread = threading.Thread(
                         target=scraper_worker,
-                        args=(queue_item.task_id, queue_item.hashtag, queue_item.num_profiles),
+                        args=(queue_item.task_id, queue_item.hashtag, queue_item.num_profiles,
+                              queue_item.profile_tabs or PROFILE_TABS, queue_item.resume,
+                              REFRESH_KNOWN_PROFILES if queue_item.refresh is None else queue_item.refresh),
                         name=f"Scraper-{queue_item.task_id}",
                         daemon=True
                     )
@@ -108,10 +170,55 @@ def process_scraper_queue():
             time.sleep(5)
 
 
-# Start queue processor thread
-import threading
-queue_processor = threading.Thread(target=process_scraper_queue, daemon=True)
-queue_processor.start()
+def queue_resumed_task(task_id: str, hashtag: str, num_profiles: int, options: dict, priority: int = 1) -> bool:
+    """
+    Queue a journaled task to continue from its last checkpoint.
+    Returns False without queueing if the task is already queued or running,
+    so two workers never resume the same checkpoint.
+    """
+    if not task_manager.mark_queued(task_id, create_task_info(hashtag, num_profiles, 'resume', priority)):
+        return False
+    task_manager.add_to_queue(task_id, hashtag, num_profiles, priority,
+                              profile_tabs=options.get("profile_tabs"), refresh=options.get("refresh"), resume=True)
+    return True
+
+
+def resume_interrupted_tasks() -> int:
+    """
+    Queue every task the journal still marks as running, i.e. tasks cut off by a
+    crash, a container restart or a shutdown timeout. Returns how many were queued.
+    """
+    queued = 0
+    for task in get_task_journal().resumable_tasks():
+        if queue_resumed_task(task["task_id"], task["hashtag"], task["num_profiles"], task["options"]):
+            logger.info(f"⏯️ Queued interrupted task {task['task_id']} for hashtag: {task['hashtag']}")
+            queued += 1
+    return queued
+
+
+def start_background_services() -> None:
+    """
+    Start the queue processor and the warm-up/sync threads. Runs once, from the
+    app's lifespan, so importing this module never starts threads or
+    touches Airtable and Chrome.
+    """
+    global background_services_started
+    with background_services_lock:
+        if background_services_started:
+            return
+        background_services_started = True
+
+    # Start queue processor thread
+    threading.Thread(target=process_scraper_queue, name="QueueProcessor", daemon=True).start()
+
+    # Launch browsers ahead of the first task so it doesn't pay Chrome startup
+    threading.Thread(target=driver_pool.warm, name="DriverPoolWarmup", daemon=True).start()
+
+    # Seed or catch up the shared username index before tasks need it
+    threading.Thread(target=lambda: get_username_index().refresh(), name="UsernameIndexSync", daemon=True).start()
+
+    # Seed or catch up the local profile replica the read endpoints serve from
+    threading.Thread(target=lambda: get_profile_replica().sync_due(), name="ProfileReplicaSync", daemon=True).start()
 
 
 # API ENDPOINTS
@@ -131,13 +238,14 @@ async def start_scraper(request: ScraperRequest, background_tasks: BackgroundTas
             logger.info(f"API request: Starting scraper for hashtag: {request.hashtag}")
         else:
             # Get active hashtags from Airtable
-            hashtags = get_active_hashtags()
+            hashtags = await hashtags_guard.run(get_active_hashtags)
             if not hashtags:
                 raise HTTPException(status_code=400, detail="No active hashtags found in Airtable")
             logger.info(f"API request: Starting scraper for {len(hashtags)} active hashtags from Airtable")
         
         # Add task to queue
-        task_manager.add_to_queue(task_id, hashtags[0], request.num_profiles, request.priority)
+        task_manager.add_to_queue(task_id, hashtags[0], request.num_profiles, request.priority,
+                                  profile_tabs=request.profile_tabs, refresh=request.refresh)
         
         # Register task with manager
         task_info = create_task_info(hashtags[0], request.num_profiles, 'api', request.priority)
@@ -152,10 +260,36 @@ async def start_scraper(request: ScraperRequest, background_tasks: BackgroundTas
             hashtags=hashtags
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error starting scraper: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/resume-task/{task_id}", response_model=ScraperResponse)
+async def resume_task(task_id: str, priority: int = 1):
+    """
+    Continue an interrupted or failed task from its last checkpoint
+    """
+    state = await tasks_guard.run(get_task_journal().load, task_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="No checkpoint found for task")
+    if state["status"] not in RESUMABLE_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Cannot resume {state['status']} task")
+
+    if not queue_resumed_task(task_id, state["hashtag"], state["num_profiles"], state["options"], priority):
+        raise HTTPException(status_code=409, detail="Task is already queued or running")
+    logger.info(f"Task {task_id} queued to resume: {len(state['candidates'])} candidates collected, "
+                f"{len(state['processed'])} processed")
+
+    return ScraperResponse(
+        task_id=task_id,
+        message=f"Resuming scraper task for hashtag: {state['hashtag']} "
+                f"({len(state['processed'])}/{len(state['candidates'])} collected profiles already processed)",
+        status="queued",
+        hashtags=[state["hashtag"]]
+    )
+
 @app.post("/llm-query", response_model=LLMQueryResponse)
 async def process_llm_query(request: AIQueryRequest):
     """
@@ -164,16 +298,18 @@ async def process_llm_query(request: AIQueryRequest):
     try:
         logger.info(f"Processing LLM query: {request.query}")
         
-        # Use the LLM to parse the query
-        filters = parse_query_to_filters(request.query)
+        # Parse with the local rules, or the LLM when they are not confident
+        filters, confidence = await aparse_query(request.query, llm_guard.run_async)
         
-        logger.info(f"LLM parsed query to filters: {filters}")
+        logger.info(f"Parsed query to filters: {filters} (confidence {confidence:.2f})")
         
         return LLMQueryResponse(
             filters=filters,
             query=request.query,
-            confidence=1.0
+            confidence=confidence
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing LLM query: {e}")
         raise HTTPException(status_code=500, detail=f"LLM processing failed: {str(e)}")
@@ -184,8 +320,8 @@ async def start_scraper_with_llm(request: AIQueryRequest, num_profiles: int = 50
     Start a scraper using LLM-parsed natural language query
     """
     try:
-        # First parse the query with LLM
-        filters = parse_query_to_filters(request.query)
+        # First parse the query (local rules, LLM when they are not confident)
+        filters, _ = await aparse_query(request.query, llm_guard.run_async)
         
         # Use the hashtag from filters if available
         hashtag = filters.hashtag if filters.hashtag else "general"
@@ -210,6 +346,8 @@ async def start_scraper_with_llm(request: AIQueryRequest, num_profiles: int = 50
             "original_query": request.query
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error starting LLM scraper: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -267,11 +405,13 @@ async def get_active_hashtags_endpoint():
     Get all active hashtags from Airtable
     """
     try:
-        hashtags = get_active_hashtags()
+        hashtags = await hashtags_guard.run(get_active_hashtags)
         return ActiveHashtagsResponse(
             hashtags=hashtags,
             count=len(hashtags)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching active hashtags: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -295,6 +435,13 @@ async def get_task_statistics():
     """
     try:
         stats = task_manager.get_task_statistics()
+        stats["driver_pool"] = driver_pool.get_statistics()
+        stats["airtable_writer"] = airtable_writer.get_statistics()
+        stats["airtable_upsert_writer"] = airtable_upsert_writer.get_statistics()
+        stats["airtable_rate_limit"] = rate_limiter.get_statistics()
+        stats["llm_cache"] = get_query_cache().get_statistics()
+        stats["endpoints"] = {guard.name: guard.get_statistics() for guard in ENDPOINT_GUARDS}
+        stats["startup"] = startup_report.get_statistics()
         return {
             "success": True,
             "statistics": stats,
@@ -351,6 +498,23 @@ async def cleanup_old_tasks(max_age_hours: int = 24):
         logger.error(f"Error cleaning up tasks: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def profile_filter_formula(hashtag: Optional[str] = None, country: Optional[str] = None,
+                           min_followers: Optional[int] = None, min_likes: Optional[int] = None) -> Optional[str]:
+    """Airtable formula for the /profiles filters, or None without filters"""
+    formula_parts = []
+
+    # Case-insensitive, like the replica's NOCASE matches
+    if hashtag:
+        formula_parts.append(f"LOWER({{Hashtag}}) = '{hashtag.lower()}'")
+    if country:
+        formula_parts.append(f"LOWER({{Country}}) = '{country.lower()}'")
+    if min_followers:
+        formula_parts.append(f"{{Followers}} >= {min_followers}")
+    if min_likes:
+        formula_parts.append(f"{{Likes}} >= {min_likes}")
+
+    return "AND(" + ", ".join(formula_parts) + ")" if formula_parts else None
+
 @app.get("/profiles")
 async def get_profiles(
     hashtag: Optional[str] = None,
@@ -360,30 +524,26 @@ async def get_profiles(
     limit: int = Query(50, ge=1, le=1000)
 ):
     """
-    Retrieve profiles from Airtable with optional filtering
+    Retrieve profiles with optional filtering, from the local replica once it is seeded
     """
     try:
-        formula_parts = []
+        formula = profile_filter_formula(hashtag, country, min_followers, min_likes)
 
-        if hashtag:
-            formula_parts.append(f"{{Hashtag}} = '{hashtag}'")
-        if country:
-            formula_parts.append(f"{{Country}} = '{country}'")
-        if min_followers:
-            formula_parts.append(f"{{Followers}} >= {min_followers}")
-        if min_likes:
-            formula_parts.append(f"{{Likes}} >= {min_likes}")
-
-        formula = "AND(" + ", ".join(formula_parts) + ")" if formula_parts else None
+        def fetch():
+            replica = get_profile_replica()
+            if replica.is_ready():
+                return replica.query(hashtag=hashtag, country=country, min_followers=min_followers,
+                                     min_likes=min_likes, limit=limit)
+            return [rec["fields"] for rec in get_table().all(max_records=limit, formula=formula)]
 
-        records = table.all(max_records=limit, formula=formula)
+        data = await profiles_guard.run(fetch)
 
-        logger.info(f"Retrieved {len(records)} profiles with filters: hashtag={hashtag}, country={country}, min_followers={min_followers}, min_likes={min_likes}")
+        logger.info(f"Retrieved {len(data)} profiles with filters: hashtag={hashtag}, country={country}, min_followers={min_followers}, min_likes={min_likes}")
 
         return {
             "success": True,
-            "count": len(records),
-            "data": [rec["fields"] for rec in records],
+            "count": len(data),
+            "data": data,
             "filters": {
                 "hashtag": hashtag,
                 "country": country,
@@ -393,6 +553,8 @@ async def get_profiles(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving profiles: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve profiles: {str(e)}")
@@ -406,15 +568,15 @@ async def search_profiles_ai(request: AIQueryRequest):
         logger.info(f"Processing AI query: {request.query}")
         
         # Step 1: Convert query → structured filters
-        filters = parse_query_to_filters(request.query)
-        logger.info(f"LLM parsed query to filters: {filters}")
+        filters, confidence = await aparse_query(request.query, llm_guard.run_async)
+        logger.info(f"Parsed query to filters: {filters} (confidence {confidence:.2f})")
 
         # Step 2: Build Airtable formula
         formula_parts = []
         if filters.hashtag:
             formula_parts.append(f"SEARCH('{filters.hashtag.lower()}', LOWER({{Hashtag}}))")
         if filters.country:
-            formula_parts.append(f"{{Country}} = '{filters.country.capitalize()}'")
+            formula_parts.append(f"LOWER({{Country}}) = '{filters.country.lower()}'")
         if filters.min_followers:
             formula_parts.append(f"{{Followers}} >= {filters.min_followers}")
         if filters.min_likes:
@@ -422,97 +584,160 @@ async def search_profiles_ai(request: AIQueryRequest):
 
         formula = "AND(" + ", ".join(formula_parts) + ")" if formula_parts else None
 
-        # Step 3: Fetch from Airtable
-        records = table.all(max_records=filters.limit, formula=formula)
+        # The LLM may return any limit, or none; keep it within what /profiles accepts
+        limit = MAX_LIMIT if filters.limit is None else min(max(filters.limit, 1), MAX_LIMIT)
+
+        # Step 3: Fetch from the local replica, or Airtable until it is seeded
+        def fetch():
+            replica = get_profile_replica()
+            if replica.is_ready():
+                return replica.query(hashtag_contains=filters.hashtag,
+                                     country=filters.country,
+                                     min_followers=filters.min_followers, min_likes=filters.min_likes,
+                                     limit=limit)
+            return [rec["fields"] for rec in get_table().all(max_records=limit, formula=formula)]
 
-        logger.info(f"AI search returned {len(records)} profiles for query: {request.query}")
+        data = await profiles_guard.run(fetch)
+
+        logger.info(f"AI search returned {len(data)} profiles for query: {request.query}")
 
         return {
             "success": True,
             "query": request.query,
             "filters": filters.dict(),
-            "count": len(records),
-            "data": [rec["fields"] for rec in records],
+            "confidence": confidence,
+            "count": len(data),
+            "data": data,
             "formula": formula
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in AI profile search: {e}")
         raise HTTPException(status_code=500, detail=f"AI profile search failed: {str(e)}")
 
 @app.get("/profiles/stats")
-async def get_profile_statistics():
+async def get_profile_statistics(
+    group_by: Optional[str] = Query(None, description=f"Extra breakdown: one of {', '.join(AGGREGATE_DIMENSIONS)}"),
+    window_hours: Optional[float] = Query(None, gt=0, le=PROFILE_STATS_MAX_WINDOW_HOURS,
+                                          description="Also count profiles added in the last N hours")
+):
     """
-    Get profile statistics and analytics
+    Get profile statistics and analytics from precomputed aggregates
     """
+    if group_by and group_by not in AGGREGATE_DIMENSIONS:
+        raise HTTPException(status_code=400,
+                            detail=f"group_by must be one of: {', '.join(AGGREGATE_DIMENSIONS)}")
     try:
-        # Get all profiles for analysis
-        all_records = table.all()
-        
-        if not all_records:
-            return {
-                "success": True,
-                "total_profiles": 0,
-                "statistics": {}
-            }
-        
-        profiles = [rec["fields"] for rec in all_records]
-        
-        # Calculate statistics
-        total_profiles = len(profiles)
-        
-        # Hashtag distribution
-        hashtag_counts = {}
-        country_counts = {}
-        follower_ranges = {
-            "0-1K": 0,
-            "1K-10K": 0,
-            "10K-100K": 0,
-            "100K-1M": 0,
-            "1M+": 0
+        return await stats_guard.run(compute_profile_statistics, group_by, window_hours)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting profile statistics: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get profile statistics: {str(e)}")
+
+
+def compute_profile_statistics(group_by: Optional[str] = None, window_hours: Optional[float] = None):
+    """Build the /profiles/stats response (blocking; run in stats_guard's executor)"""
+    replica = get_profile_replica()
+    if not replica.is_ready():
+        return live_profile_statistics()
+
+    stats = replica.statistics()
+    if not stats["total_profiles"]:
+        return {
+            "success": True,
+            "total_profiles": 0,
+            "statistics": {}
         }
-        
-        for profile in profiles:
-            # Hashtag counting
-            hashtag = profile.get("Hashtag", "unknown")
-            hashtag_counts[hashtag] = hashtag_counts.get(hashtag, 0) + 1
-            
-            # Country counting
-            country = profile.get("Country", "unknown")
-            country_counts[country] = country_counts.get(country, 0) + 1
-            
-            # Follower range counting
-            followers = profile.get("Followers", 0)
-            if followers < 1000:
-                follower_ranges["0-1K"] += 1
-            elif followers < 10000:
-                follower_ranges["1K-10K"] += 1
-            elif followers < 100000:
-                follower_ranges["10K-100K"] += 1
-            elif followers < 1000000:
-                follower_ranges["100K-1M"] += 1
-            else:
-                follower_ranges["1M+"] += 1
-        
-        # Sort by count
-        top_hashtags = sorted(hashtag_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        top_countries = sorted(country_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        
+
+    statistics = {
+        "hashtag_distribution": dict(stats["top_hashtags"]),
+        "country_distribution": dict(stats["top_countries"]),
+        "follower_ranges": stats["follower_ranges"],
+        "top_hashtags": stats["top_hashtags"][:5],
+        "top_countries": stats["top_countries"][:5]
+    }
+    if group_by:
+        statistics[f"{group_by}_distribution"] = dict(replica.aggregate(group_by))
+    if window_hours:
+        statistics["added_in_window"] = {"hours": window_hours, "count": replica.added_since(window_hours)}
+
+    return {
+        "success": True,
+        "total_profiles": stats["total_profiles"],
+        "statistics": statistics
+    }
+
+def live_profile_statistics():
+    """
+    Compute /profiles/stats from a full Airtable read, used until the local
+    replica has been seeded
+    """
+    # Get all profiles for analysis
+    all_records = get_table().all()
+    
+    if not all_records:
         return {
             "success": True,
-            "total_profiles": total_profiles,
-            "statistics": {
-                "hashtag_distribution": dict(top_hashtags),
-                "country_distribution": dict(top_countries),
-                "follower_ranges": follower_ranges,
-                "top_hashtags": top_hashtags[:5],
-                "top_countries": top_countries[:5]
-            }
+            "total_profiles": 0,
+            "statistics": {}
         }
-        
-    except Exception as e:
-        logger.error(f"Error getting profile statistics: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get profile statistics: {str(e)}")
+    
+    profiles = [rec["fields"] for rec in all_records]
+    
+    # Calculate statistics
+    total_profiles = len(profiles)
+    
+    # Hashtag distribution
+    hashtag_counts = {}
+    country_counts = {}
+    follower_ranges = {
+        "0-1K": 0,
+        "1K-10K": 0,
+        "10K-100K": 0,
+        "100K-1M": 0,
+        "1M+": 0
+    }
+    
+    for profile in profiles:
+        # Hashtag counting
+        hashtag = profile.get("Hashtag", "unknown")
+        hashtag_counts[hashtag] = hashtag_counts.get(hashtag, 0) + 1
+        
+        # Country counting
+        country = profile.get("Country", "unknown")
+        country_counts[country] = country_counts.get(country, 0) + 1
+        
+        # Follower range counting
+        followers = profile.get("Followers", 0)
+        if followers < 1000:
+            follower_ranges["0-1K"] += 1
+        elif followers < 10000:
+            follower_ranges["1K-10K"] += 1
+        elif followers < 100000:
+            follower_ranges["10K-100K"] += 1
+        elif followers < 1000000:
+            follower_ranges["100K-1M"] += 1
+        else:
+            follower_ranges["1M+"] += 1
+    
+    # Sort by count
+    top_hashtags = sorted(hashtag_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_countries = sorted(country_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    
+    return {
+        "success": True,
+        "total_profiles": total_profiles,
+        "statistics": {
+            "hashtag_distribution": dict(top_hashtags),
+            "country_distribution": dict(top_countries),
+            "follower_ranges": follower_ranges,
+            "top_hashtags": top_hashtags[:5],
+            "top_countries": top_countries[:5]
+        }
+    }
 
 @app.get("/profiles/search")
 async def search_profiles_advanced(
@@ -526,22 +751,108 @@ async def search_profiles_advanced(
         # Build search formula for text search
         search_formula = f"OR(SEARCH('{q.lower()}', LOWER({{Username}})), SEARCH('{q.lower()}', LOWER({{Bio}})), SEARCH('{q.lower()}', LOWER({{Hashtag}})))"
         
-        records = table.all(max_records=limit, formula=search_formula)
+        def fetch():
+            replica = get_profile_replica()
+            if replica.is_ready():
+                return replica.query(text=q, limit=limit)
+            return [rec["fields"] for rec in get_table().all(max_records=limit, formula=search_formula)]
+
+        data = await search_guard.run(fetch)
         
-        logger.info(f"Advanced search for '{q}' returned {len(records)} profiles")
+        logger.info(f"Advanced search for '{q}' returned {len(data)} profiles")
         
         return {
             "success": True,
             "query": q,
-            "count": len(records),
-            "data": [rec["fields"] for rec in records],
+            "count": len(data),
+            "data": data,
             "search_formula": search_formula
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in advanced profile search: {e}")
         raise HTTPException(status_code=500, detail=f"Advanced search failed: {str(e)}")
 
+def iterate_export_records(hashtag: Optional[str], country: Optional[str], min_followers: Optional[int],
+                           min_likes: Optional[int], fields: Optional[List[str]]) -> Iterator[dict]:
+    """Matching profiles one at a time: from the replica once it is seeded, else page by page from Airtable"""
+    replica = get_profile_replica()
+    if replica.is_ready():
+        records = replica.iterate(hashtag=hashtag, country=country, min_followers=min_followers,
+                                  min_likes=min_likes)
+    else:
+        options = {"page_size": EXPORT_AIRTABLE_PAGE_SIZE}
+        formula = profile_filter_formula(hashtag, country, min_followers, min_likes)
+        if formula:
+            options["formula"] = formula
+        if fields:
+            options["fields"] = fields
+        pages = get_table().iterate(**options)
+        records = (record["fields"] for page in pages for record in page)
+
+    for record in records:
+        yield {field: record.get(field) for field in fields} if fields else record
+
+def stream_export(records: Iterator[dict], export_format: str, fields: Optional[List[str]]) -> Iterator[str]:
+    """
+    Serialize records as NDJSON lines or CSV rows, sent in ~EXPORT_CHUNK_BYTES
+    chunks. Runs in Starlette's threadpool, so paging never blocks the event loop.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        columns = fields or EXPORT_CSV_FIELDS
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        # The header goes out before the first page is read
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    count = 0
+    try:
+        for record in records:
+            if writer:
+                writer.writerow([record.get(column) for column in columns])
+            else:
+                buffer.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        logger.info(f"📤 Exported {count} profiles as {export_format}")
+    except Exception as e:
+        # Headers are already sent: all we can do is stop the stream early
+        logger.error(f"❌ Profile export failed after {count} profiles: {e}")
+        raise
+
+@app.get("/profiles/export")
+async def export_profiles(
+    format: str = Query("ndjson", description=f"One of: {', '.join(EXPORT_MEDIA_TYPES)}"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to include, e.g. Username,Followers"),
+    hashtag: Optional[str] = None,
+    country: Optional[str] = None,
+    min_followers: Optional[int] = None,
+    min_likes: Optional[int] = None
+):
+    """
+    Stream every matching profile as NDJSON or CSV, without a record limit
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_MEDIA_TYPES)}")
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    records = iterate_export_records(hashtag, country, min_followers, min_likes, field_list)
+    return StreamingResponse(
+        stream_export(records, format, field_list),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=profiles.{format}"}
+    )
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -564,12 +875,14 @@ async def root():
             "POST /start-scraper-with-llm",
             "GET /task-status/{task_id}",
             "GET /active-tasks",
+            "POST /resume-task/{task_id}",
             "GET /active-hashtags",
             "GET /health",
             "GET /task-statistics",
             "GET /profiles",
             "POST /profiles/ai",
             "GET /profiles/stats",
-            "GET /profiles/search"
+            "GET /profiles/search",
+            "GET /profiles/export"
         ]
     }
@@ -0,0 +1,186 @@
+import os
+import time
+import logging
+import threading
+from functools import partial
+from typing import Dict, List, Optional
+
+from src.tikTok_Scraper import get_driver, CAPTURE_NETWORK
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "3"))  # Max drivers alive at once
+DRIVER_POOL_WARM = int(os.getenv("DRIVER_POOL_WARM", "1"))  # Drivers launched ahead of the first task
+MAX_PAGES_PER_DRIVER = int(os.getenv("MAX_PAGES_PER_DRIVER", "300"))  # Navigations before a driver is recycled
+RESET_ORIGINS = ["https://www.tiktok.com"]
+
+
+class PooledDriver:
+    """
+    Thin proxy around a WebDriver that counts page loads for the pool.
+    Every other attribute is delegated to the wrapped driver.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages_loaded = 0
+        self.created_at = time.time()
+
+    def get(self, url):
+        self.note_page_load()
+        return self._driver.get(url)
+
+    def note_page_load(self):
+        """Count a navigation started without get(), e.g. a background tab load"""
+        self.pages_loaded += 1
+
+    def quit(self):
+        # Pooled drivers are returned with DriverPool.checkin, not quit by callers
+        logger.debug("Ignoring quit() on a pooled driver")
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class DriverPool:
+    """
+    Thread-safe pool of warm browser instances shared across scraper tasks
+    """
+
+    def __init__(self, factory, max_size: int = DRIVER_POOL_SIZE, max_pages: int = MAX_PAGES_PER_DRIVER):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.idle: List[PooledDriver] = []
+        self.in_use = 0
+        self.condition = threading.Condition()
+        self.stats: Dict[str, int] = {"created": 0, "recycled": 0, "unhealthy": 0, "checkouts": 0}
+
+    def _create(self) -> PooledDriver:
+        driver = PooledDriver(self.factory())
+        with self.condition:
+            self.stats["created"] += 1
+        logger.info("🚗 Driver pool launched a new browser")
+        return driver
+
+    def _destroy(self, driver: PooledDriver) -> None:
+        try:
+            driver._driver.quit()
+        except Exception as e:
+            logger.debug(f"Error quitting pooled driver: {e}")
+
+    def is_healthy(self, driver: PooledDriver) -> bool:
+        """Check that the browser still responds and has an open window"""
+        try:
+            return bool(driver.window_handles) and driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def reset(self, driver: PooledDriver) -> None:
+        """Close extra tabs and clear cookies and site storage so the next task starts clean"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in RESET_ORIGINS:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        driver._driver.get("about:blank")
+
+    def warm(self, count: int = DRIVER_POOL_WARM) -> None:
+        """Launch up to `count` idle drivers ahead of demand"""
+        for _ in range(count):
+            with self.condition:
+                if len(self.idle) + self.in_use >= self.max_size:
+                    return
+                self.in_use += 1
+            try:
+                driver = self._create()
+            except Exception as e:
+                logger.error(f"❌ Failed to warm driver pool: {e}")
+                with self.condition:
+                    self.in_use -= 1
+                    self.condition.notify()
+                return
+            with self.condition:
+                self.in_use -= 1
+                self.idle.append(driver)
+                self.condition.notify()
+        logger.info(f"🔥 Driver pool warmed: {len(self.idle)} idle drivers")
+
+    def checkout(self, timeout: Optional[float] = None) -> Optional[PooledDriver]:
+        """
+        Take a healthy driver from the pool, launching one if below max_size.
+        Blocks until one is available; returns None if `timeout` expires first.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self.condition:
+                while not self.idle and self.in_use >= self.max_size:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self.condition.wait(remaining)
+                driver = self.idle.pop() if self.idle else None
+                self.in_use += 1
+                self.stats["checkouts"] += 1
+
+            if driver is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self.condition:
+                        self.in_use -= 1
+                        self.condition.notify()
+                    raise
+
+            if self.is_healthy(driver):
+                return driver
+
+            logger.warning("⚠️ Discarding unhealthy pooled driver")
+            self._destroy(driver)
+            with self.condition:
+                self.in_use -= 1
+                self.stats["unhealthy"] += 1
+
+    def checkin(self, driver: PooledDriver) -> None:
+        """Return a driver after a task; it is reset, or recycled when worn out or broken"""
+        keep = driver.pages_loaded < self.max_pages and self.is_healthy(driver)
+        if keep:
+            try:
+                self.reset(driver)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to reset pooled driver: {e}")
+                keep = False
+
+        if not keep:
+            logger.info(f"♻️ Recycling driver after {driver.pages_loaded} pages")
+            self._destroy(driver)
+
+        with self.condition:
+            self.in_use -= 1
+            if keep:
+                self.idle.append(driver)
+            else:
+                self.stats["recycled"] += 1
+            self.condition.notify()
+
+    def shutdown(self) -> None:
+        """Quit all idle drivers"""
+        with self.condition:
+            idle, self.idle = self.idle, []
+        for driver in idle:
+            self._destroy(driver)
+        logger.info(f"🧹 Driver pool shut down ({len(idle)} idle drivers closed)")
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Get pool size and lifetime counters"""
+        with self.condition:
+            return {"idle": len(self.idle), "in_use": self.in_use, "max_size": self.max_size, **self.stats}
+
+
+# Global driver pool instance
+driver_pool = DriverPool(partial(get_driver, capture_network=CAPTURE_NETWORK))
@@ -0,0 +1,98 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+API_READ_CONCURRENCY = int(os.getenv("API_READ_CONCURRENCY", "16"))  # Concurrent requests (and threads) per read endpoint
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "15"))
+API_LLM_CONCURRENCY = int(os.getenv("API_LLM_CONCURRENCY", "4"))  # Concurrent LLM calls
+API_LLM_TIMEOUT = float(os.getenv("API_LLM_TIMEOUT", "30"))
+
+
+class EndpointGuard:
+    """
+    Concurrency limit, timeout and thread pool for one endpoint (or group of endpoints).
+
+    run() offloads a blocking call to the guard's own executor, which has
+    exactly `concurrency` threads; run_async() awaits a coroutine. Both wait
+    for one of `concurrency` slots and give up with a 503 (no slot in time) or
+    504 (call too slow) after `timeout` seconds. A blocking call that timed out
+    keeps its slot until its thread really finishes, so a slow backend only
+    ever ties up its own endpoint's threads.
+    """
+
+    def __init__(self, name: str, concurrency: int, timeout: float):
+        self.name = name
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency,
+                                           thread_name_prefix=f"api-{name.replace(' ', '-')}")
+        self.in_flight = 0
+        self.stats: Dict[str, int] = {"calls": 0, "rejected": 0, "timeouts": 0}
+
+    async def _acquire(self) -> None:
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            logger.warning(f"⚠️ {self.name}: no free slot within {self.timeout:.0f}s")
+            raise HTTPException(status_code=503, detail=f"{self.name} is busy, try again later")
+        self.in_flight += 1
+        self.stats["calls"] += 1
+
+    def _release(self, *_) -> None:
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def _timed_out(self) -> HTTPException:
+        self.stats["timeouts"] += 1
+        logger.warning(f"⚠️ {self.name}: timed out after {self.timeout:.0f}s")
+        return HTTPException(status_code=504, detail=f"{self.name} timed out after {self.timeout:.0f}s")
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function in this guard's executor"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        await self._acquire()
+        future = loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+        # The slot is freed when the thread finishes, not when the caller gives up
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(deadline - loop.time(), 0.1))
+        except asyncio.TimeoutError:
+            raise self._timed_out()
+
+    async def run_async(self, make_awaitable: Callable[[], Awaitable]) -> Any:
+        """Await make_awaitable() under this endpoint's concurrency limit and timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        await self._acquire()
+        try:
+            return await asyncio.wait_for(make_awaitable(), max(deadline - loop.time(), 0.1))
+        except asyncio.TimeoutError:
+            raise self._timed_out()
+        finally:
+            self._release()
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Get in-flight count and lifetime counters"""
+        return {"in_flight": self.in_flight, "limit": self.concurrency, **self.stats}
+
+
+# Per-endpoint guards
+profiles_guard = EndpointGuard("profiles", API_READ_CONCURRENCY, API_READ_TIMEOUT)
+search_guard = EndpointGuard("profile search", API_READ_CONCURRENCY, API_READ_TIMEOUT)
+stats_guard = EndpointGuard("profile statistics", API_READ_CONCURRENCY, API_READ_TIMEOUT)
+hashtags_guard = EndpointGuard("active hashtags", API_READ_CONCURRENCY, API_READ_TIMEOUT)
+tasks_guard = EndpointGuard("task journal", API_READ_CONCURRENCY, API_READ_TIMEOUT)
+llm_guard = EndpointGuard("LLM query parsing", API_LLM_CONCURRENCY, API_LLM_TIMEOUT)
+
+ENDPOINT_GUARDS = [profiles_guard, search_guard, stats_guard, hashtags_guard, tasks_guard, llm_guard]
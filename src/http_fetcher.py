@@ -0,0 +1,158 @@
+import os
+import asyncio
+import logging
+from typing import Callable, Iterable, Optional, Tuple
+
+import httpx
+
+from src.schemas import Profile
+from src.profile_parser import embedded_state_from_html, user_from_embedded_state, has_complete_stats, build_profile
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+HTTP_CONCURRENCY = int(os.getenv("HTTP_CONCURRENCY", "8"))  # Profile requests in flight at once
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+# Markers of TikTok's bot-check / captcha interstitials
+CHALLENGE_MARKERS = ("captcha", "verify-bar", "secsdk-captcha", "_wafchallengeid", "tiktok-verify-page")
+CHALLENGE_STATUS_CODES = (403, 429)
+
+
+def is_challenge_page(status_code: int, html: str) -> bool:
+    """
+    Detect responses that only a real browser can get past.
+    Only meant for pages without usable profile state: the markers are plain
+    substrings, and a real profile can mention "captcha" in its bio.
+    """
+    if status_code in CHALLENGE_STATUS_CODES:
+        return True
+    lowered = (html or "").lower()
+    return any(marker in lowered for marker in CHALLENGE_MARKERS)
+
+
+class HttpProfileFetcher:
+    """
+    Browserless Phase 2 engine: fetches server-rendered profile pages over a
+    pooled async HTTP client and parses their embedded state JSON into Profiles.
+
+    Candidates that hit a challenge page (or whose page carries no usable state)
+    are escalated so the caller can scrape them with Selenium instead.
+    """
+
+    def __init__(self, proxy: Optional[str] = None, concurrency: int = HTTP_CONCURRENCY,
+                 timeout: float = HTTP_TIMEOUT, http2: bool = True):
+        self.proxy = proxy if proxy is not None else os.getenv("PROXY")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.http2 = http2
+        if http2:
+            try:
+                import h2  # noqa: F401 - httpx needs it for HTTP/2
+            except ImportError:
+                logger.warning("h2 is not installed, falling back to HTTP/1.1")
+                self.http2 = False
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=self.http2,
+            proxy=self.proxy or None,
+            headers=DEFAULT_HEADERS,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+
+    async def fetch_profile(self, client: httpx.AsyncClient, candidate: dict,
+                            base_hashtag: str) -> Tuple[Optional[Profile], bool]:
+        """
+        Fetch and parse one candidate's profile page.
+
+        Returns:
+            tuple: (profile, escalate) - escalate is True when the page needs a browser
+        """
+        url = candidate["profile_link"]
+        try:
+            response = await client.get(url)
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP fetch failed for {url}: {e}")
+            return None, True
+
+        if response.status_code not in CHALLENGE_STATUS_CODES:
+            state = embedded_state_from_html(response.text)
+            user, stats = user_from_embedded_state(state, candidate["username"])
+            if user and has_complete_stats(stats):
+                return build_profile(user, stats, candidate["country"], base_hashtag), False
+
+        if is_challenge_page(response.status_code, response.text):
+            logger.info(f"🧱 Challenge page for {url} (status {response.status_code}), escalating to browser")
+        else:
+            logger.info(f"No embedded state for {url}, escalating to browser")
+        return None, True
+
+    async def run(self, candidates: Iterable[dict], base_hashtag: str,
+                  on_profile: Callable[[dict, Profile], None], on_escalate: Callable[[dict], None]) -> None:
+        """
+        Fetch all candidates with at most `concurrency` requests in flight.
+
+        `candidates` may block (e.g. a queue iterator); it is read off the event
+        loop. on_profile / on_escalate are synchronous callbacks run in a worker
+        thread so slow saves don't stall other fetches. A candidate whose
+        on_profile raises (e.g. a failed save) is escalated too, so the browser
+        path retries it instead of the candidate being dropped.
+        """
+        iterator = iter(candidates)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = set()
+
+        async def deliver(candidate, profile):
+            try:
+                await asyncio.to_thread(on_profile, candidate, profile)
+            except Exception as e:
+                logger.error(f"❌ Error handling profile {candidate['profile_link']}, escalating to browser: {e}")
+                await asyncio.to_thread(on_escalate, candidate)
+
+        async def handle(client, candidate):
+            try:
+                profile, escalate = await self.fetch_profile(client, candidate, base_hashtag)
+                if escalate:
+                    await asyncio.to_thread(on_escalate, candidate)
+                else:
+                    await deliver(candidate, profile)
+            except Exception as e:
+                logger.error(f"❌ Error handling profile {candidate['profile_link']}: {e}")
+            finally:
+                semaphore.release()
+
+        async with self._client() as client:
+            while True:
+                await semaphore.acquire()
+                candidate = await asyncio.to_thread(next, iterator, None)
+                if candidate is None:
+                    semaphore.release()
+                    break
+                if candidate.get("profile") is not None:
+                    # Already captured during collection, nothing to fetch
+                    try:
+                        await deliver(candidate, candidate["profile"])
+                    except Exception as e:
+                        logger.error(f"❌ Error handling profile {candidate['profile_link']}: {e}")
+                    finally:
+                        semaphore.release()
+                    continue
+                task = asyncio.create_task(handle(client, candidate))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            if pending:
+                await asyncio.gather(*pending)
+
+    def run_sync(self, candidates: Iterable[dict], base_hashtag: str,
+                 on_profile: Callable[[dict, Profile], None], on_escalate: Callable[[dict], None]) -> None:
+        """Blocking wrapper around run() for scraper threads"""
+        asyncio.run(self.run(candidates, base_hashtag, on_profile, on_escalate))
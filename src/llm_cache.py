@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1000"))  # Parsed queries kept in memory
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_DISK = os.getenv("LLM_CACHE_DISK", "true").lower() == "true"  # Keep parsed queries across restarts
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.db")
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace never change the parsed filters: fold them away"""
+    return " ".join(query.lower().split())
+
+
+class QueryCache:
+    """
+    Cache of LLM query parses, keyed by normalized query and a version string.
+
+    Results are JSON-serializable dicts kept in an in-memory LRU and, when a
+    path is given, in a SQLite table that survives restarts. Entries expire
+    after `ttl` seconds. The version is part of every key and rows written
+    under another version are dropped when the store opens, so changing the
+    prompt, schema or model invalidates the cache on its own.
+
+    get_or_compute() and aget_or_compute() coalesce concurrent misses for the
+    same query: one caller runs the LLM, the others (sync or async) wait for
+    its result. Failures are shared with the waiters but never cached.
+    """
+
+    def __init__(self, version: str, size: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL_SECONDS,
+                 path: Optional[str] = None):
+        self.version = version
+        self.size = size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()  # SQLite I/O never holds self.lock, which the event loop takes
+        self.memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.in_flight: Dict[str, Future] = {}
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+                                     key TEXT PRIMARY KEY, version TEXT NOT NULL,
+                                     value TEXT NOT NULL, created_at REAL NOT NULL)""")
+            removed = self.conn.execute("DELETE FROM llm_cache WHERE version != ? OR created_at < ?",
+                                        (version, time.time() - ttl)).rowcount
+            self.conn.commit()
+            if removed:
+                logger.info(f"🧹 Dropped {removed} stale or outdated LLM cache entries")
+
+    def key(self, query: str) -> str:
+        return hashlib.sha256(f"{self.version}\n{normalize_query(query)}".encode()).hexdigest()
+
+    def get(self, query: str) -> Optional[dict]:
+        """Cached result for a query, or None"""
+        key = self.key(query)
+        value = self._get_memory(key)
+        return value if value is not None else self._get_disk(key)
+
+    def _get_memory(self, key: str) -> Optional[dict]:
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if time.time() - created_at < self.ttl:
+                    self.memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self.memory[key]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[dict]:
+        if self.conn is None:
+            return None
+        with self.db_lock:
+            row = self.conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ? AND created_at >= ?",
+                                    (key, time.time() - self.ttl)).fetchone()
+        if not row:
+            return None
+        value = json.loads(row[0])
+        with self.lock:
+            self._remember(key, row[1], value)
+            self.stats["disk_hits"] += 1
+        return value
+
+    def put(self, query: str, value: dict) -> None:
+        key = self.key(query)
+        now = time.time()
+        with self.lock:
+            self._remember(key, now, value)
+        if self.conn is not None:
+            with self.db_lock:
+                self.conn.execute("INSERT OR REPLACE INTO llm_cache (key, version, value, created_at) VALUES (?, ?, ?, ?)",
+                                  (key, self.version, json.dumps(value), now))
+                self.conn.commit()
+
+    def _remember(self, key: str, created_at: float, value: dict) -> None:
+        self.memory[key] = (created_at, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.size:
+            self.memory.popitem(last=False)
+
+    def _claim(self, query: str):
+        """Return (key, future, is_leader): the leader computes, everyone else waits on the future"""
+        key = self.key(query)
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return key, future, False
+            future = Future()
+            future.set_running_or_notify_cancel()  # Running futures cannot be cancelled by one waiter
+            self.in_flight[key] = future
+            self.stats["misses"] += 1
+            return key, future, True
+
+    def _settle(self, key: str, future: Future, query: str, value=None, error: BaseException = None) -> None:
+        if error is None:
+            try:
+                self.put(query, value)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not cache LLM result: {e}")
+        with self.lock:
+            self.in_flight.pop(key, None)
+        if error is None:
+            future.set_result(value)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # The leader was cancelled (e.g. its request timed out); waiters get a plain error
+            future.set_exception(RuntimeError("LLM query parse was cancelled"))
+
+    def get_or_compute(self, query: str, compute: Callable[[str], dict]) -> dict:
+        """Cached result, or compute(query) run once for all concurrent callers"""
+        value = self.get(query)
+        if value is not None:
+            return value
+        key, future, leader = self._claim(query)
+        if not leader:
+            return future.result()
+        try:
+            value = compute(query)
+        except BaseException as e:
+            self._settle(key, future, query, error=e)
+            raise
+        self._settle(key, future, query, value)
+        return value
+
+    async def aget_or_compute(self, query: str, compute: Callable[[str], Awaitable[dict]]) -> dict:
+        """
+        Async get_or_compute(); shares in-flight calls with sync callers too.
+        Only the in-memory probe runs on the event loop: SQLite reads and
+        writes go to a worker thread.
+        """
+        value = self._get_memory(self.key(query))
+        if value is None and self.conn is not None:
+            value = await asyncio.to_thread(self._get_disk, self.key(query))
+        if value is not None:
+            return value
+        key, future, leader = self._claim(query)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            value = await compute(query)
+        except BaseException as e:
+            self._settle(key, future, query, error=e)
+            raise
+        await asyncio.to_thread(self._settle, key, future, query, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self.lock:
+            self.memory.clear()
+        if self.conn is not None:
+            with self.db_lock:
+                self.conn.execute("DELETE FROM llm_cache")
+                self.conn.commit()
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Get entry count and lifetime hit/miss counters"""
+        with self.lock:
+            return {"entries": len(self.memory), "in_flight": len(self.in_flight), **self.stats}
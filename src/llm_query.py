@@ -1,31 +1,147 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Awaitable, Callable, Optional, Tuple
 
 from src.schemas import ProfileFilters
+from src.llm_cache import QueryCache, LLM_CACHE_DISK, LLM_CACHE_DB
+from src.query_parser import parse_query_rules, RULE_PARSER_MIN_CONFIDENCE
+from src.startup_report import startup_report
+from src.utils import data_file_path
 
+logger = logging.getLogger(__name__)
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0,
-    google_api_key=os.getenv("GOOGLE_API_KEY")
-)
+LLM_MODEL = "gemini-2.5-flash"
 
-parser = PydanticOutputParser(pydantic_object=ProfileFilters)
-
-prompt_template = ChatPromptTemplate.from_messages([
+PROMPT_MESSAGES = [
     ("system", "You are an assistant that converts a natural language TikTok profile search into structured filters."),
     ("system", "Output the result strictly in JSON matching this schema: {schema}"),
     ("human", "{query}")
-])
+]
 
+# The Gemini client, prompt and cache are built on first use: langchain alone takes
+# about a second to import, and most queries never reach the LLM
+_llm = None
+_prompt = None
+_query_cache = None
+_lock = threading.Lock()
 
-def parse_query_to_filters(query: str) -> ProfileFilters:
-    prompt = prompt_template.format_messages(
+
+def get_llm():
+    """Get the Gemini chat model"""
+    global _llm
+    with _lock:
+        if _llm is None:
+            with startup_report.measure("Gemini client"):
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                _llm = ChatGoogleGenerativeAI(
+                    model=LLM_MODEL,
+                    temperature=0,
+                    google_api_key=os.getenv("GOOGLE_API_KEY")
+                )
+        return _llm
+
+
+def get_prompt():
+    """Get the (prompt_template, parser) pair"""
+    global _prompt
+    with _lock:
+        if _prompt is None:
+            with startup_report.measure("LLM prompt"):
+                from langchain.prompts import ChatPromptTemplate
+                from langchain.output_parsers import PydanticOutputParser
+                _prompt = (ChatPromptTemplate.from_messages(PROMPT_MESSAGES),
+                           PydanticOutputParser(pydantic_object=ProfileFilters))
+        return _prompt
+
+
+def build_prompt(query: str):
+    prompt_template, parser = get_prompt()
+    return prompt_template.format_messages(
         query=query,
         schema=parser.get_format_instructions()
     )
-    response = llm.invoke(prompt)
-    return parser.parse(response.content)
+
+
+def prompt_version() -> str:
+    """Hash of everything that shapes the LLM's answer; a change invalidates cached parses"""
+    payload = json.dumps([LLM_MODEL, PROMPT_MESSAGES, ProfileFilters.schema()], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def get_query_cache() -> QueryCache:
+    """Get the process-wide LLM parse cache, opening it on first use"""
+    global _query_cache
+    with _lock:
+        if _query_cache is None:
+            _query_cache = QueryCache(prompt_version(), path=data_file_path(LLM_CACHE_DB) if LLM_CACHE_DISK else None)
+        return _query_cache
+
+
+def _invoke(query: str) -> dict:
+    response = get_llm().invoke(build_prompt(query))
+    return get_prompt()[1].parse(response.content).dict()
+
+
+async def _ainvoke(query: str) -> dict:
+    # The first call imports langchain and builds the client (about a second), and
+    # _lock may be held by a sync caller doing the same: keep both off the event loop
+    llm, messages, parser = await asyncio.to_thread(lambda: (get_llm(), build_prompt(query), get_prompt()[1]))
+    response = await llm.ainvoke(messages)
+    return parser.parse(response.content).dict()
+
+
+def parse_query_to_filters(query: str) -> ProfileFilters:
+    return parse_query(query)[0]
+
+
+async def aparse_query_to_filters(query: str) -> ProfileFilters:
+    """Parse with the LLM only (cached), awaiting it without blocking the event loop"""
+    return ProfileFilters(**await get_query_cache().aget_or_compute(query, _ainvoke))
+
+
+def parse_query(query: str) -> Tuple[ProfileFilters, float]:
+    """
+    Parse a search query into filters and a confidence score.
+
+    Simple queries are parsed by the local rules; the LLM is only asked when
+    their confidence is below RULE_PARSER_MIN_CONFIDENCE. If the LLM fails,
+    a partial rule parse is still returned with its low confidence.
+    """
+    filters, confidence = parse_query_rules(query)
+    if confidence >= RULE_PARSER_MIN_CONFIDENCE:
+        return filters, confidence
+    try:
+        return ProfileFilters(**get_query_cache().get_or_compute(query, _invoke)), 1.0
+    except Exception as e:
+        return _fallback(query, filters, confidence, e)
+
+
+async def aparse_query(query: str,
+                       limiter: Optional[Callable[[Callable[[], Awaitable]], Awaitable]] = None
+                       ) -> Tuple[ProfileFilters, float]:
+    """
+    Async parse_query(). limiter (e.g. an EndpointGuard's run_async) wraps the
+    LLM call only, so rule-parsed queries never wait for an LLM slot.
+    """
+    filters, confidence = parse_query_rules(query)
+    if confidence >= RULE_PARSER_MIN_CONFIDENCE:
+        return filters, confidence
+    try:
+        if limiter is not None:
+            return await limiter(lambda: aparse_query_to_filters(query)), 1.0
+        return await aparse_query_to_filters(query), 1.0
+    except Exception as e:
+        return _fallback(query, filters, confidence, e)
+
+
+def _fallback(query: str, filters: ProfileFilters, confidence: float, error: Exception):
+    if not confidence:
+        raise error
+    logger.warning(f"⚠️ LLM unavailable ({error}), using rule-based parse of '{query}' "
+                   f"(confidence {confidence:.2f})")
+    return filters, confidence
 
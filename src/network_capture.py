@@ -0,0 +1,78 @@
+import json
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Hashtag pages fetch their video batches from this endpoint
+ITEM_LIST_URL_MARKERS = ("/api/challenge/item_list/",)
+
+
+class ItemListCapture:
+    """
+    Collects TikTok item_list JSON responses from Chrome's performance log.
+
+    Requires a driver created with get_driver(capture_network=True), which turns
+    on performance logging so Network.* events are recorded. Reading the log
+    drains it, so requests whose body has not finished loading yet are kept in
+    `pending` until a later poll sees their Network.loadingFinished event.
+    """
+
+    def __init__(self, driver, url_markers=ITEM_LIST_URL_MARKERS):
+        self.driver = driver
+        self.url_markers = url_markers
+        self.pending: Dict[str, str] = {}
+
+    def _matches(self, url: str) -> bool:
+        return any(marker in url for marker in self.url_markers)
+
+    def _read_body(self, request_id: str, url: str):
+        try:
+            result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            return json.loads(result.get("body") or "{}")
+        except Exception as e:
+            logger.debug(f"Could not read response body for {url}: {e}")
+            return None
+
+    def poll(self) -> List[dict]:
+        """Return the parsed JSON payloads of item_list responses finished since the last poll"""
+        payloads = []
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            logger.warning(f"Could not read performance log: {e}")
+            return payloads
+
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+
+            method = message.get("method")
+            params = message.get("params", {})
+
+            if method == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                if self._matches(url):
+                    self.pending[params.get("requestId")] = url
+            elif method == "Network.loadingFinished":
+                url = self.pending.pop(params.get("requestId"), None)
+                if url:
+                    payload = self._read_body(params.get("requestId"), url)
+                    if payload:
+                        payloads.append(payload)
+            elif method == "Network.loadingFailed":
+                self.pending.pop(params.get("requestId"), None)
+
+        if payloads:
+            logger.debug(f"Captured {len(payloads)} item_list responses")
+        return payloads
+
+    def reset(self) -> None:
+        """Drop buffered log entries and pending requests, e.g. before navigating to a new page"""
+        try:
+            self.driver.get_log("performance")
+        except Exception:
+            pass
+        self.pending.clear()
@@ -0,0 +1,111 @@
+import re
+import json
+from typing import Optional
+from src.schemas import Profile
+
+TIKTOK_PROFILE_URL = "https://www.tiktok.com/@{username}"
+
+
+def profile_url_for(username: str) -> str:
+    """Build the canonical TikTok profile URL for a username"""
+    return TIKTOK_PROFILE_URL.format(username=username)
+
+
+def has_complete_stats(stats: dict) -> bool:
+    """
+    Check whether a TikTok stats object carries both counts we store.
+    Item-list responses sometimes omit authorStats for private or new accounts.
+    """
+    if not stats:
+        return False
+    return "followerCount" in stats and ("heartCount" in stats or "heart" in stats)
+
+
+def build_profile(user: dict, stats: dict, country: str, hashtag: str) -> Optional[Profile]:
+    """
+    Map TikTok's JSON user/stats objects to a Profile.
+
+    user:  {"uniqueId": str, "signature": str, "avatarLarger": str, ...}
+    stats: {"followerCount": int, "heartCount": int, ...}
+
+    Returns None when the user object has no uniqueId.
+    """
+    username = (user or {}).get("uniqueId")
+    if not username:
+        return None
+    stats = stats or {}
+
+    return Profile(
+        Username=username,
+        Bio=(user.get("signature") or "").strip(),
+        Followers=int(stats.get("followerCount") or 0),
+        Likes=int(stats.get("heartCount") or stats.get("heart") or 0),
+        Profile_URL=profile_url_for(username),
+        Image_URL=user.get("avatarLarger") or user.get("avatarMedium") or user.get("avatarThumb") or "",
+        Country=(country or "").upper(),
+        Hashtag=(hashtag or "").lower()
+    )
+
+
+def authors_from_item_list(payload: dict):
+    """
+    Yield (author, authorStats) pairs from a hashtag item_list API response.
+    """
+    for item in (payload or {}).get("itemList") or []:
+        author = item.get("author") or {}
+        if author.get("uniqueId"):
+            yield author, item.get("authorStats") or {}
+
+
+def user_from_embedded_state(state: dict, username: str):
+    """
+    Find the (user, stats) pair for a profile page in TikTok's embedded state JSON.
+
+    Supports both the current __UNIVERSAL_DATA_FOR_REHYDRATION__ layout
+    (__DEFAULT_SCOPE__ -> webapp.user-detail -> userInfo) and the older
+    SIGI_STATE layout (UserModule -> users/stats keyed by username).
+    Returns (None, None) when the state holds no user, or only other users:
+    a state whose uniqueId is not `username` belongs to another page (e.g. the
+    previous profile a tab showed) and must not be read as this one.
+    """
+    state = state or {}
+    wanted = (username or "").lower()
+
+    scope = state.get("__DEFAULT_SCOPE__")
+    if scope:
+        user_info = (scope.get("webapp.user-detail") or {}).get("userInfo") or {}
+        user = user_info.get("user")
+        if user and (user.get("uniqueId") or "").lower() == wanted:
+            # statsV2 carries counts as strings and does not overflow on large accounts
+            return user, user_info.get("statsV2") or user_info.get("stats") or {}
+        return None, None
+
+    user_module = state.get("UserModule")
+    if user_module:
+        users = user_module.get("users") or {}
+        stats = user_module.get("stats") or {}
+        key = next((key for key in users if key.lower() == wanted), None)
+        if key:
+            return users[key], stats.get(key) or {}
+
+    return None, None
+
+
+EMBEDDED_STATE_PATTERN = re.compile(
+    r'<script[^>]+id="(?:__UNIVERSAL_DATA_FOR_REHYDRATION__|SIGI_STATE)"[^>]*>(.*?)</script>',
+    re.DOTALL
+)
+
+
+def embedded_state_from_html(html: str) -> Optional[dict]:
+    """
+    Parse the embedded state JSON out of a server-rendered profile page.
+    Returns None when the page has no (valid) state script.
+    """
+    match = EMBEDDED_STATE_PATTERN.search(html or "")
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
@@ -0,0 +1,332 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from src.airtable import get_table, modified_since_formula, modified_since_timestamp, SYNC_OVERLAP_SECONDS
+from src.utils import data_file_path, parse_airtable_time
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+PROFILE_REPLICA_DB = os.getenv("PROFILE_REPLICA_DB", "profiles.db")
+PROFILE_REPLICA_SYNC_MINUTES = int(os.getenv("PROFILE_REPLICA_SYNC_MINUTES", "5"))  # Incremental pull interval
+PROFILE_REPLICA_FULL_SYNC_HOURS = int(os.getenv("PROFILE_REPLICA_FULL_SYNC_HOURS", "24"))  # Picks up deletions
+PROFILE_EXPORT_PAGE_SIZE = int(os.getenv("PROFILE_EXPORT_PAGE_SIZE", "500"))  # Rows read per page when exporting
+PROFILE_STATS_MAX_WINDOW_HOURS = int(os.getenv("PROFILE_STATS_MAX_WINDOW_HOURS", "720"))  # created_hour buckets kept
+
+FOLLOWER_RANGES = ("0-1K", "1K-10K", "10K-100K", "100K-1M", "1M+")
+# Counters kept per dimension: SQL expression of a profiles row ({row} is NEW, OLD or profiles)
+AGGREGATE_DIMENSIONS = {
+    "hashtag": "COALESCE({row}.hashtag, 'unknown')",
+    "country": "COALESCE({row}.country, 'unknown')",
+    "hashtag_country": "COALESCE({row}.hashtag, 'unknown') || '/' || COALESCE({row}.country, 'unknown')",
+    "follower_range": """CASE WHEN COALESCE({row}.followers, 0) < 1000 THEN '0-1K'
+                              WHEN {row}.followers < 10000 THEN '1K-10K'
+                              WHEN {row}.followers < 100000 THEN '10K-100K'
+                              WHEN {row}.followers < 1000000 THEN '100K-1M'
+                              ELSE '1M+' END""",
+    "created_hour": "COALESCE(CAST(CAST({row}.created_at / 3600 AS INTEGER) AS TEXT), 'unknown')",
+}
+
+
+def aggregate_trigger_sql() -> str:
+    """Triggers that keep profile_aggregates in step with every insert, update and delete on profiles"""
+    def changes(row, delta):
+        return "".join(
+            f"""INSERT INTO profile_aggregates (dimension, key, count)
+                VALUES ('{dimension}', {expression.format(row=row)}, {delta})
+                ON CONFLICT(dimension, key) DO UPDATE SET count = count + ({delta});
+            """
+            for dimension, expression in AGGREGATE_DIMENSIONS.items()
+        )
+
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS profiles_aggregate_insert AFTER INSERT ON profiles BEGIN
+            {changes("NEW", 1)}
+        END;
+        CREATE TRIGGER IF NOT EXISTS profiles_aggregate_delete AFTER DELETE ON profiles BEGIN
+            {changes("OLD", -1)}
+        END;
+        CREATE TRIGGER IF NOT EXISTS profiles_aggregate_update AFTER UPDATE ON profiles BEGIN
+            {changes("OLD", -1)}
+            {changes("NEW", 1)}
+        END;
+    """
+
+
+class ProfileReplica:
+    """
+    Local SQLite replica of the Airtable profiles table for the read endpoints.
+
+    Kept current by incremental pulls on LAST_MODIFIED_TIME(), periodic full
+    pulls (which also drop records deleted in Airtable) and the records the
+    scrapers write themselves. Rows keep the original Airtable fields so query
+    results look exactly like live Airtable responses.
+
+    Counts per hashtag, country, hashtag/country, follower range and creation
+    hour are kept in profile_aggregates by triggers, so statistics never scan
+    the profiles table. Every full sync recounts them from scratch, and every
+    sync drops creation hours older than PROFILE_STATS_MAX_WINDOW_HOURS.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_file_path(PROFILE_REPLICA_DB)
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                record_id TEXT PRIMARY KEY,
+                username TEXT,
+                bio TEXT,
+                hashtag TEXT,
+                country TEXT,
+                followers INTEGER,
+                likes INTEGER,
+                created_at REAL,
+                fields TEXT NOT NULL
+            );
+            -- Results are ordered by (created_at, record_id), so a LIMIT stops after `limit` index
+            -- entries instead of sorting every match. Hashtag and country match case-insensitively
+            -- ("Uk" finds "UK") and lead their own ordered indexes.
+            CREATE INDEX IF NOT EXISTS idx_profiles_created ON profiles (created_at, record_id);
+            CREATE INDEX IF NOT EXISTS idx_profiles_hashtag_nocase ON profiles (hashtag COLLATE NOCASE, created_at, record_id);
+            CREATE INDEX IF NOT EXISTS idx_profiles_country_nocase ON profiles (country COLLATE NOCASE, created_at, record_id);
+            CREATE INDEX IF NOT EXISTS idx_profiles_followers ON profiles (followers);
+            CREATE INDEX IF NOT EXISTS idx_profiles_likes ON profiles (likes);
+            CREATE TABLE IF NOT EXISTS replica_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS profile_aggregates (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (dimension, key)
+            );
+        """)
+        self.conn.executescript(aggregate_trigger_sql())
+        self.conn.commit()
+
+    def _row(self, record: dict) -> tuple:
+        fields = record.get("fields") or {}
+        return (
+            record["id"], fields.get("Username"), fields.get("Bio"), fields.get("Hashtag"), fields.get("Country"),
+            fields.get("Followers"), fields.get("Likes"), parse_airtable_time(record.get("createdTime")),
+            json.dumps(fields)
+        )
+
+    def _upsert(self, records: List[dict]) -> None:
+        self.conn.executemany(
+            """INSERT INTO profiles
+               (record_id, username, bio, hashtag, country, followers, likes, created_at, fields)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(record_id) DO UPDATE SET
+                   username = excluded.username, bio = excluded.bio, hashtag = excluded.hashtag,
+                   country = excluded.country, followers = excluded.followers, likes = excluded.likes,
+                   created_at = excluded.created_at, fields = excluded.fields""",
+            (self._row(record) for record in records if record.get("id"))
+        )
+
+    def upsert_records(self, records: List[dict]) -> None:
+        """Apply Airtable records the scraper just created or updated"""
+        with self.lock:
+            self._upsert(records)
+            self.conn.commit()
+
+    def _meta(self, key: str) -> Optional[float]:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM replica_meta WHERE key = ?", (key,)).fetchone()
+        return float(row[0]) if row else None
+
+    def is_ready(self) -> bool:
+        """Whether the replica has completed its first full pull"""
+        return self._meta("last_full_sync") is not None
+
+    def sync(self, full: bool = False) -> int:
+        """
+        Pull records from Airtable: only those modified since the last pull, or
+        the whole table when `full` (or when the replica was never seeded).
+
+        Returns:
+            int: Number of records pulled
+        """
+        with self.sync_lock:
+            last_synced = self._meta("last_synced")
+            full = full or last_synced is None or not self.is_ready()
+            started_at = time.time()
+
+            since = None if full else modified_since_timestamp(last_synced)
+            records = get_table().all(formula=modified_since_formula(since))
+
+            with self.lock:
+                self._upsert(records)
+                if full:
+                    # Records no longer in Airtable were deleted there; ones the scrapers
+                    # created while the pull was running are kept
+                    self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_records (record_id TEXT PRIMARY KEY)")
+                    self.conn.execute("DELETE FROM seen_records")
+                    self.conn.executemany("INSERT OR IGNORE INTO seen_records VALUES (?)",
+                                          ((record["id"],) for record in records))
+                    self.conn.execute(
+                        """DELETE FROM profiles WHERE record_id NOT IN (SELECT record_id FROM seen_records)
+                           AND (created_at IS NULL OR created_at < ?)""",
+                        (started_at - SYNC_OVERLAP_SECONDS,)
+                    )
+                    self.conn.execute("INSERT OR REPLACE INTO replica_meta VALUES ('last_full_sync', ?)",
+                                      (str(started_at),))
+                    self._rebuild_aggregates()
+                self._prune_created_hours()
+                self.conn.execute("INSERT OR REPLACE INTO replica_meta VALUES ('last_synced', ?)", (str(started_at),))
+                self.conn.commit()
+
+            logger.info(f"🗄️ {'Full' if full else 'Incremental'} profile replica sync: {len(records)} records "
+                        f"in {time.time() - started_at:.2f}s")
+            return len(records)
+
+    def sync_due(self) -> None:
+        """Scheduled sync: a full pull when PROFILE_REPLICA_FULL_SYNC_HOURS have passed, else incremental"""
+        last_full = self._meta("last_full_sync")
+        full = last_full is None or time.time() - last_full >= PROFILE_REPLICA_FULL_SYNC_HOURS * 3600
+        self.sync(full=full)
+
+    @staticmethod
+    def _filter_clauses(hashtag: Optional[str] = None, country: Optional[str] = None,
+                        min_followers: Optional[int] = None, min_likes: Optional[int] = None,
+                        hashtag_contains: Optional[str] = None, text: Optional[str] = None):
+        clauses, params = [], []
+        if hashtag:
+            clauses.append("hashtag = ? COLLATE NOCASE")
+            params.append(hashtag)
+        if country:
+            clauses.append("country = ? COLLATE NOCASE")
+            params.append(country)
+        if min_followers:
+            clauses.append("followers >= ?")
+            params.append(min_followers)
+        if min_likes:
+            clauses.append("likes >= ?")
+            params.append(min_likes)
+        if hashtag_contains:
+            clauses.append("instr(lower(hashtag), ?) > 0")
+            params.append(hashtag_contains.lower())
+        if text:
+            clauses.append("(instr(lower(username), ?) > 0 OR instr(lower(bio), ?) > 0 OR instr(lower(hashtag), ?) > 0)")
+            params.extend([text.lower()] * 3)
+        return clauses, params
+
+    def query(self, hashtag: Optional[str] = None, country: Optional[str] = None,
+              min_followers: Optional[int] = None, min_likes: Optional[int] = None,
+              hashtag_contains: Optional[str] = None, text: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """
+        Filter profiles like the endpoints' Airtable formulas did and return their fields.
+
+        hashtag / country: exact match, ignoring case
+        hashtag_contains: case-insensitive substring of Hashtag
+        text: case-insensitive substring of Username, Bio or Hashtag
+        """
+        clauses, params = self._filter_clauses(hashtag, country, min_followers, min_likes, hashtag_contains, text)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT fields FROM profiles {where} ORDER BY created_at, record_id LIMIT ?",
+                (*params, limit if limit is not None else -1)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iterate(self, hashtag: Optional[str] = None, country: Optional[str] = None,
+                min_followers: Optional[int] = None, min_likes: Optional[int] = None,
+                page_size: int = PROFILE_EXPORT_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Yield the fields of every matching profile, reading `page_size` rows at a
+        time. Pages continue from the last rowid seen, so memory stays flat and
+        the lock is only held while a page is read, never between pages.
+        """
+        clauses, params = self._filter_clauses(hashtag, country, min_followers, min_likes)
+        last_rowid = 0
+        while True:
+            where = " AND ".join(["rowid > ?", *clauses])
+            with self.lock:
+                rows = self.conn.execute(
+                    f"SELECT rowid, fields FROM profiles WHERE {where} ORDER BY rowid LIMIT ?",
+                    (last_rowid, *params, page_size)
+                ).fetchall()
+            for _, fields in rows:
+                yield json.loads(fields)
+            if len(rows) < page_size:
+                return
+            last_rowid = rows[-1][0]
+
+    def rebuild_aggregates(self) -> None:
+        """Recount every aggregate from the profiles table, correcting any drift"""
+        with self.lock:
+            self._rebuild_aggregates()
+            self.conn.commit()
+
+    def _rebuild_aggregates(self) -> None:
+        self.conn.execute("DELETE FROM profile_aggregates")
+        for dimension, expression in AGGREGATE_DIMENSIONS.items():
+            self.conn.execute(
+                f"""INSERT INTO profile_aggregates (dimension, key, count)
+                    SELECT ?, {expression.format(row="profiles")}, COUNT(*) FROM profiles GROUP BY 2""",
+                (dimension,)
+            )
+
+    def _prune_created_hours(self) -> None:
+        # Hours no /profiles/stats window can reach; a later delete of an old profile may
+        # leave a negative bucket there, which aggregate() hides and the next sync drops
+        first_hour = int((time.time() - PROFILE_STATS_MAX_WINDOW_HOURS * 3600) // 3600)
+        self.conn.execute(
+            """DELETE FROM profile_aggregates
+               WHERE dimension = 'created_hour' AND key != 'unknown' AND CAST(key AS INTEGER) < ?""",
+            (first_hour,)
+        )
+
+    def aggregate(self, dimension: str, top: Optional[int] = None) -> List[tuple]:
+        """(key, count) pairs of one aggregate dimension, largest first"""
+        if dimension not in AGGREGATE_DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dimension!r}, expected one of {', '.join(AGGREGATE_DIMENSIONS)}")
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT key, count FROM profile_aggregates WHERE dimension = ? AND count > 0
+                   ORDER BY count DESC, key LIMIT ?""",
+                (dimension, top if top is not None else -1)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def added_since(self, hours: float) -> int:
+        """Profiles created in the last `hours`, to hour granularity"""
+        first_hour = int((time.time() - hours * 3600) // 3600)
+        with self.lock:
+            row = self.conn.execute(
+                """SELECT COALESCE(SUM(count), 0) FROM profile_aggregates
+                   WHERE dimension = 'created_hour' AND key != 'unknown' AND CAST(key AS INTEGER) >= ?""",
+                (first_hour,)
+            ).fetchone()
+        return row[0]
+
+    def statistics(self, top: int = 10) -> Dict:
+        """Hashtag and country distributions and follower ranges, read from the precomputed aggregates"""
+        follower_ranges = {label: 0 for label in FOLLOWER_RANGES}
+        follower_ranges.update(dict(self.aggregate("follower_range")))
+        return {
+            "total_profiles": sum(follower_ranges.values()),
+            "top_hashtags": self.aggregate("hashtag", top),
+            "top_countries": self.aggregate("country", top),
+            "follower_ranges": follower_ranges,
+        }
+
+
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_profile_replica() -> ProfileReplica:
+    """Get the process-wide profile replica, opening it on first use"""
+    global _replica
+    with _replica_lock:
+        if _replica is None:
+            _replica = ProfileReplica()
+        return _replica
@@ -0,0 +1,180 @@
+import os
+import re
+from typing import Optional, Tuple
+
+from src.schemas import ProfileFilters
+from src.utils import parse_count
+
+# CONFIGURATION
+RULE_PARSER_MIN_CONFIDENCE = float(os.getenv("RULE_PARSER_MIN_CONFIDENCE", "0.8"))  # Below this the LLM parses
+MAX_LIMIT = 1000  # Same cap as the /profiles endpoints
+
+# Country codes as the scraper stores them (upper-cased), with the names people type for them
+COUNTRY_ALIASES = {
+    "USA": ["usa", "u.s.a.", "u.s.", "united states", "united states of america", "america", "american"],
+    "UK": ["uk", "u.k.", "united kingdom", "great britain", "britain", "british", "england", "english"],
+    "CANADA": ["canada", "canadian"],
+    "AUSTRALIA": ["australia", "australian", "aus"],
+    "GERMANY": ["germany", "german", "deutschland"],
+    "FRANCE": ["france", "french"],
+    "ITALY": ["italy", "italian"],
+    "SPAIN": ["spain", "spanish"],
+    "JAPAN": ["japan", "japanese"],
+    "CHINA": ["china", "chinese"],
+    "INDIA": ["india", "indian"],
+    "BRAZIL": ["brazil", "brasil", "brazilian"],
+    "MEXICO": ["mexico", "mexican"],
+    "RUSSIA": ["russia", "russian"],
+    "SOUTHKOREA": ["south korea", "southkorea", "korea", "korean"],
+    "UAE": ["uae", "u.a.e.", "united arab emirates", "emirates", "emirati"],
+    "SAUDIARABIA": ["saudi arabia", "saudiarabia", "saudi", "ksa"],
+    "TURKEY": ["turkey", "turkiye", "türkiye", "turkish"],
+    "INDONESIA": ["indonesia", "indonesian"],
+    "SINGAPORE": ["singapore", "singaporean"],
+}
+# Aliases that are adjectives: right before a topic word they may describe it ("american football")
+DEMONYMS = {
+    "american", "british", "english", "canadian", "australian", "german", "french", "italian", "spanish",
+    "japanese", "chinese", "indian", "brazilian", "mexican", "russian", "korean", "emirati", "turkish",
+    "indonesian", "singaporean",
+}
+_ALIASES = sorted(((alias, code) for code, aliases in COUNTRY_ALIASES.items() for alias in aliases),
+                  key=lambda item: -len(item[0]))
+COUNTRY_PATTERN = re.compile(r"(?<![\w.])(" + "|".join(re.escape(alias) for alias, _ in _ALIASES) + r")(?![\w])")
+COUNTRY_CODES = dict(_ALIASES)
+
+NUMBER = r"(\d[\d,]*(?:\.\d+)?)\s*(k|m|b|thousand|million|billion)?\+?"
+MORE = r"more than|greater than|over|above|at least|minimum of|minimum|min|>=|>"
+LESS = r"less than|fewer than|under|below|at most|maximum of|maximum|max|<=|<"
+METRIC = r"(followers?|fans|likes?|hearts?)"
+METRIC_PATTERNS = [
+    # "more than 10k followers", "10k+ likes", "with 1.5 million followers"
+    re.compile(rf"(?:({MORE}|{LESS})\s*)?{NUMBER}\s*{METRIC}\b"),
+    # "followers over 10k", "likes of at least 1m"
+    re.compile(rf"\b{METRIC}\s*(?:of\s+|count\s+)?({MORE}|{LESS})\s*{NUMBER}"),
+]
+LIMIT_PATTERNS = [
+    re.compile(r"\b(?:top|first|limit(?:\s+to)?|up\s+to|max(?:imum)?\s+of)\s+(\d+)\b(?!\s*(?:k|m|b|thousand|million|billion|followers?|likes?)\b)"),
+    re.compile(r"(?:^|\b(?:find|show|get|give|list|me)\s+)(\d+)\s+(?=(?:[a-z]+\s+){0,2}(?:creators?|influencers?|bloggers?|vloggers?|profiles?|accounts?|tiktokers?|users?|people|pages)\b)"),
+]
+HASHTAG_PATTERNS = [
+    re.compile(r"#([\w]+)"),
+    re.compile(r"\b(?:hashtag|tagged|tag)\s+([a-z0-9_]+)"),
+]
+UNIT_SUFFIX = {"thousand": "k", "million": "m", "billion": "b"}
+
+CREATOR_NOUNS = {
+    "creator", "creators", "influencer", "influencers", "blogger", "bloggers", "vlogger", "vloggers",
+    "profile", "profiles", "account", "accounts", "tiktoker", "tiktokers", "user", "users", "people", "pages",
+}
+FILLER_WORDS = {
+    "find", "show", "me", "us", "get", "give", "list", "search", "for", "looking", "look", "i", "we", "want",
+    "need", "please", "all", "any", "some", "the", "a", "an", "of", "with", "who", "that", "have", "has",
+    "having", "in", "from", "based", "located", "living", "at", "on", "tiktok", "content", "and", "are", "is",
+    "can", "you",
+}
+# Describe reach or quality rather than a topic; the LLM may turn them into minimums
+VAGUE_WORDS = {
+    "popular", "famous", "top", "best", "big", "biggest", "small", "micro", "mega", "viral", "trending",
+    "high", "low", "engagement", "engaging", "active", "new", "verified", "rising", "large", "huge",
+}
+
+
+def _count(number: str, unit: Optional[str]) -> int:
+    unit = UNIT_SUFFIX.get(unit or "", unit or "")
+    return parse_count(number.replace(",", "") + unit)
+
+
+def parse_query_rules(query: str) -> Tuple[ProfileFilters, float]:
+    """
+    Parse a simple profile search without the LLM.
+
+    Handles hashtags ("#travel", "travel creators", "tagged travel"), countries
+    and their aliases, follower/like minimums with K/M suffixes ("over 10k
+    followers", "1.5M+ likes") and limits from 1 to MAX_LIMIT ("top 20").
+
+    Returns:
+        (filters, confidence): confidence is the share of meaningful words the
+        rules accounted for, 0.0 when nothing was recognised. Anything they
+        cannot express (upper bounds, "high engagement", ...) lowers it.
+    """
+    text = " ".join(query.lower().split())
+    filters = ProfileFilters()
+    explained, unknown = 0, 0
+
+    def consume(match: re.Match) -> None:
+        nonlocal text
+        text = text[:match.start()] + " " + text[match.end():]
+
+    for pattern in METRIC_PATTERNS:
+        while (match := pattern.search(text)) is not None:
+            groups = match.groups()
+            if pattern is METRIC_PATTERNS[0]:
+                comparator, number, unit, metric = groups
+            else:
+                metric, comparator, number, unit = groups
+            consume(match)
+            if comparator and re.fullmatch(LESS, comparator):
+                unknown += 2  # Upper bounds do not fit ProfileFilters
+                continue
+            field = "min_followers" if metric.startswith(("follower", "fan")) else "min_likes"
+            setattr(filters, field, _count(number, unit))
+            explained += 1
+
+    for pattern in LIMIT_PATTERNS:
+        if filters.limit != ProfileFilters().limit:
+            break
+        if (match := pattern.search(text)) is not None:
+            consume(match)
+            if not 1 <= int(match.group(1)) <= MAX_LIMIT:
+                unknown += 2  # "top 0" or "top 10000000" is not a usable limit: let the LLM read the query
+                break
+            filters.limit = int(match.group(1))
+            explained += 1
+
+    for pattern in HASHTAG_PATTERNS:
+        if filters.hashtag is None and (match := pattern.search(text)) is not None:
+            filters.hashtag = match.group(1)
+            consume(match)
+            explained += 1
+
+    countries, ambiguous = set(), 0
+    while (match := COUNTRY_PATTERN.search(text)) is not None:
+        countries.add(COUNTRY_CODES[match.group(1)])
+        following = re.match(r"\s*([a-z0-9_']+)", text[match.end():])
+        if match.group(1) in DEMONYMS and following and following.group(1) not in CREATOR_NOUNS | FILLER_WORDS:
+            ambiguous += 1  # "american football creators": a topic, a country, or both
+        consume(match)
+    # "us" is only a country when written "US" or after "from"/"in" ("creators from us")
+    us_match = re.search(r"\b(?:from|in)\s+(us)\b", text)
+    if us_match is not None:
+        countries.add("USA")
+        text = text[:us_match.start(1)] + " " + text[us_match.end(1):]
+    elif re.search(r"\bUS\b", query):
+        countries.add("USA")
+        text = re.sub(r"\bus\b", " ", text, count=1)
+    unknown += ambiguous
+    if len(countries) == 1:
+        filters.country = countries.pop()
+        explained += 1
+    elif countries:
+        unknown += len(countries)  # Only one country fits ProfileFilters
+
+    words = re.findall(r"[a-z0-9_']+", text)
+    leftovers = {}  # position -> word the rules could not place
+    for i, word in enumerate(words):
+        if word in CREATOR_NOUNS:
+            topical = [j for j in (i - 2, i - 1) if j in leftovers and leftovers[j] not in VAGUE_WORDS]
+            if filters.hashtag is None and i - 1 in topical:
+                # The words right before "creators" name the topic: "home decor creators" -> homedecor
+                topic = topical if topical == [i - 2, i - 1] else [i - 1]
+                filters.hashtag = "".join(leftovers.pop(j) for j in topic)
+                explained += 1
+            continue
+        if word not in FILLER_WORDS:
+            leftovers[i] = word
+    unknown += len(leftovers)
+
+    if not explained:
+        return filters, 0.0
+    return filters, round(explained / (explained + unknown), 2)
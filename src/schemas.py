@@ -38,6 +38,8 @@ class ScraperRequest(BaseModel):
     hashtag: Optional[str] = None  # If not provided, will use active hashtags from Airtable
     num_profiles: int = 500
     priority: int = 1  # Higher number = higher priority
+    profile_tabs: Optional[int] = Field(None, ge=1, le=8)  # Parallel profile tabs per browser; default PROFILE_TABS
+    refresh: Optional[bool] = None  # Re-scrape stale known profiles; default REFRESH_KNOWN_PROFILES
 
 class ScraperResponse(BaseModel):
     task_id: str
@@ -95,6 +97,9 @@ class TaskQueueItem(BaseModel):
     hashtag: str
     num_profiles: int
     priority: int = 1
+    profile_tabs: Optional[int] = None
+    refresh: Optional[bool] = None
+    resume: bool = False  # Continue from the task's journal checkpoint
     created_at: float = Field(default_factory=lambda: datetime.now().timestamp())
 
 class ThreadInfo(BaseModel):
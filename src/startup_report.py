@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Modules timed by `python -m src.startup_report`, in the order main.py pulls them in
+REPORT_MODULES = [
+    "src.schemas", "src.utils", "src.airtable", "src.airtable_writer", "src.llm_cache", "src.query_parser",
+    "src.llm_query", "src.http_fetcher", "src.tikTok_Scraper", "src.driver_pool", "src.task_manager",
+    "src.endpoint_guard", "src.profile_replica", "src.api",
+]
+
+
+class StartupReport:
+    """
+    Timeline of process startup plus the cost of every lazily built client.
+
+    mark() records how long after the process started a stage was reached
+    (imports done, app ready); measure() / record() time one initialization,
+    such as the first Airtable or Gemini client. Clients are built on first
+    use, so their cost shows up here instead of delaying the port bind.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages: List[Tuple[str, float]] = []
+        self.inits: Dict[str, float] = {}
+
+    def mark(self, stage: str) -> float:
+        """Record that `stage` was reached; returns seconds since startup began"""
+        elapsed = time.perf_counter() - self.started
+        with self.lock:
+            self.stages.append((stage, elapsed))
+        return elapsed
+
+    def record(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.inits[name] = seconds
+        logger.info(f"⏱️ Initialized {name} in {seconds * 1000:.0f}ms")
+
+    @contextmanager
+    def measure(self, name: str):
+        """Time the block as the initialization of `name`"""
+        started = time.perf_counter()
+        yield
+        self.record(name, time.perf_counter() - started)
+
+    def log(self) -> None:
+        with self.lock:
+            stages = ", ".join(f"{stage} {elapsed:.2f}s" for stage, elapsed in self.stages)
+        logger.info(f"⏱️ Startup: {stages}")
+
+    def get_statistics(self) -> Dict:
+        """Get stage times and client initialization times, in seconds"""
+        with self.lock:
+            return {
+                "stages": {stage: round(elapsed, 3) for stage, elapsed in self.stages},
+                "initializations": {name: round(seconds, 3) for name, seconds in self.inits.items()},
+            }
+
+
+def import_cost(module: str, python: Optional[str] = None) -> Optional[float]:
+    """Seconds a fresh interpreter needs to import `module`, or None if the import fails"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([python or sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+# Global startup report, created when main.py starts importing
+startup_report = StartupReport()
+
+
+if __name__ == "__main__":
+    # Cold import cost of each module on its own, including everything it imports
+    for module in REPORT_MODULES:
+        cost = import_cost(module)
+        print(f"{module:<24} {'import failed' if cost is None else f'{cost * 1000:7.0f}ms'}")
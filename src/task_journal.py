@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from src.schemas import Profile
+from src.utils import data_file_path
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+TASK_JOURNAL_DB = os.getenv("TASK_JOURNAL_DB", "task_journal.db")
+TASK_JOURNAL = os.getenv("TASK_JOURNAL", "true").lower() == "true"
+RESUMABLE_STATUSES = ("running", "failed")
+TASK_JOURNAL_FAILED_RETENTION_HOURS = int(os.getenv("TASK_JOURNAL_FAILED_RETENTION_HOURS", "168"))  # Window to resume failed tasks
+
+
+class TaskJournal:
+    """
+    Durable per-task checkpoint journal.
+
+    A scrape task appends every collected candidate, every hashtag variation it
+    finished and every profile it processed as it goes. After a crash or a
+    restart, load() hands that state back so the task can continue where it
+    stopped instead of starting over.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_file_path(TASK_JOURNAL_DB)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS journal_tasks (
+                task_id TEXT PRIMARY KEY,
+                hashtag TEXT NOT NULL,
+                num_profiles INTEGER NOT NULL,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS journal_candidates (
+                task_id TEXT NOT NULL,
+                profile_link TEXT NOT NULL,
+                username TEXT NOT NULL,
+                country TEXT,
+                profile TEXT,
+                seq INTEGER NOT NULL,
+                PRIMARY KEY (task_id, profile_link)
+            );
+            CREATE TABLE IF NOT EXISTS journal_variations (
+                task_id TEXT NOT NULL,
+                hashtag TEXT NOT NULL,
+                country TEXT,
+                PRIMARY KEY (task_id, hashtag)
+            );
+            CREATE TABLE IF NOT EXISTS journal_processed (
+                task_id TEXT NOT NULL,
+                profile_link TEXT NOT NULL,
+                saved INTEGER NOT NULL,
+                processed_at REAL NOT NULL,
+                PRIMARY KEY (task_id, profile_link)
+            );
+        """)
+        self.conn.commit()
+
+    def _write(self, sql: str, params: tuple) -> None:
+        with self.lock:
+            self.conn.execute(sql, params)
+            self.conn.commit()
+
+    def start_task(self, task_id: str, hashtag: str, num_profiles: int, options: Optional[Dict] = None) -> None:
+        """Register a task, or mark an existing one as running again"""
+        now = time.time()
+        self._write(
+            """INSERT INTO journal_tasks (task_id, hashtag, num_profiles, options, status, created_at, updated_at)
+               VALUES (?, ?, ?, ?, 'running', ?, ?)
+               ON CONFLICT(task_id) DO UPDATE SET status = 'running', error = NULL, updated_at = excluded.updated_at""",
+            (task_id, hashtag, num_profiles, json.dumps(options or {}), now, now)
+        )
+
+    def finish_task(self, task_id: str, status: str, error: Optional[str] = None) -> None:
+        """Record the final status of a task ('completed' or 'failed')"""
+        self._write("UPDATE journal_tasks SET status = ?, error = ?, updated_at = ? WHERE task_id = ?",
+                    (status, error, time.time(), task_id))
+
+    def record_candidate(self, task_id: str, candidate: dict) -> None:
+        """Append a collected candidate, including its captured profile if it has one"""
+        profile = candidate.get("profile")
+        self._write(
+            """INSERT OR REPLACE INTO journal_candidates (task_id, profile_link, username, country, profile, seq)
+               VALUES (?, ?, ?, ?, ?, (SELECT COUNT(*) FROM journal_candidates WHERE task_id = ?))""",
+            (task_id, candidate["profile_link"], candidate["username"], candidate.get("country"),
+             json.dumps(profile.dict()) if profile is not None else None, task_id)
+        )
+
+    def record_variation(self, task_id: str, hashtag: str, country: str) -> None:
+        """Mark a hashtag variation as fully collected"""
+        self._write("INSERT OR IGNORE INTO journal_variations (task_id, hashtag, country) VALUES (?, ?, ?)",
+                    (task_id, hashtag, country))
+
+    def record_processed(self, task_id: str, profile_link: str, saved: bool) -> None:
+        """Advance the Phase 2 cursor past a candidate, whether or not it was saved"""
+        self._write(
+            "INSERT OR REPLACE INTO journal_processed (task_id, profile_link, saved, processed_at) VALUES (?, ?, ?, ?)",
+            (task_id, profile_link, int(bool(saved)), time.time())
+        )
+
+    def load(self, task_id: str) -> Optional[Dict]:
+        """
+        Get the checkpoint of a task.
+
+        Returns:
+            dict: task_id, hashtag, num_profiles, options, status, candidates
+            (in collection order), finished_variations and processed links,
+            or None if the task is not in the journal
+        """
+        with self.lock:
+            task = self.conn.execute(
+                "SELECT hashtag, num_profiles, options, status FROM journal_tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            if task is None:
+                return None
+            candidate_rows = self.conn.execute(
+                "SELECT profile_link, username, country, profile FROM journal_candidates WHERE task_id = ? ORDER BY seq",
+                (task_id,)
+            ).fetchall()
+            variation_rows = self.conn.execute(
+                "SELECT hashtag FROM journal_variations WHERE task_id = ?", (task_id,)
+            ).fetchall()
+            processed_rows = self.conn.execute(
+                "SELECT profile_link FROM journal_processed WHERE task_id = ?", (task_id,)
+            ).fetchall()
+
+        candidates = []
+        for profile_link, username, country, profile in candidate_rows:
+            candidate = {"profile_link": profile_link, "username": username, "country": country}
+            if profile:
+                candidate["profile"] = Profile(**json.loads(profile))
+            candidates.append(candidate)
+
+        hashtag, num_profiles, options, status = task
+        return {
+            "task_id": task_id,
+            "hashtag": hashtag,
+            "num_profiles": num_profiles,
+            "options": json.loads(options),
+            "status": status,
+            "candidates": candidates,
+            "finished_variations": {row[0] for row in variation_rows},
+            "processed": {row[0] for row in processed_rows},
+        }
+
+    def resumable_tasks(self, statuses=("running",)) -> List[Dict]:
+        """
+        List tasks left in one of `statuses`. A task still marked 'running' when
+        the process starts was interrupted by a crash or restart.
+        """
+        placeholders = ", ".join("?" for _ in statuses)
+        with self.lock:
+            rows = self.conn.execute(
+                f"""SELECT task_id, hashtag, num_profiles, options, status, updated_at FROM journal_tasks
+                    WHERE status IN ({placeholders}) ORDER BY created_at""",
+                tuple(statuses)
+            ).fetchall()
+        return [
+            {"task_id": task_id, "hashtag": hashtag, "num_profiles": num_profiles, "options": json.loads(options),
+             "status": status, "updated_at": updated_at}
+            for task_id, hashtag, num_profiles, options, status, updated_at in rows
+        ]
+
+    def prune(self, max_age_hours: int = 24, failed_max_age_hours: int = TASK_JOURNAL_FAILED_RETENTION_HOURS) -> int:
+        """
+        Delete completed tasks older than max_age_hours, and failed tasks (kept
+        longer so they can still be resumed) older than failed_max_age_hours.
+        Returns how many were removed.
+        """
+        now = time.time()
+        with self.lock:
+            task_ids = [row[0] for row in self.conn.execute(
+                """SELECT task_id FROM journal_tasks
+                   WHERE (status = 'completed' AND updated_at < ?) OR (status = 'failed' AND updated_at < ?)""",
+                (now - max_age_hours * 3600, now - failed_max_age_hours * 3600)
+            )]
+            for table in ("journal_candidates", "journal_variations", "journal_processed", "journal_tasks"):
+                self.conn.executemany(f"DELETE FROM {table} WHERE task_id = ?", [(t,) for t in task_ids])
+            self.conn.commit()
+        return len(task_ids)
+
+
+class TaskCheckpoint:
+    """
+    A task's view of the journal, handed to the scraping pipeline.
+
+    Holds the state restored from a previous run (candidates, finished
+    variations, processed links) and appends new progress as it happens.
+    """
+
+    def __init__(self, journal: TaskJournal, task_id: str, state: Optional[Dict] = None):
+        self.journal = journal
+        self.task_id = task_id
+        state = state or {}
+        self.candidates: List[dict] = state.get("candidates", [])
+        for candidate in self.candidates:
+            # The previous run may have saved this profile and crashed before journaling
+            # it as processed, so its save has to be an upsert rather than a create
+            candidate["replayed"] = True
+        self.finished_variations = set(state.get("finished_variations", ()))
+        self.processed = set(state.get("processed", ()))
+
+    def pending_variations(self, hashtag_country_pairs):
+        """Drop the variations a previous run already collected to the end of their feed"""
+        return [(hashtag, country) for hashtag, country in hashtag_country_pairs
+                if hashtag not in self.finished_variations]
+
+    def unprocessed(self, candidates):
+        """Candidates whose profile has not been handled yet"""
+        return [c for c in candidates if c["profile_link"] not in self.processed]
+
+    def record_candidate(self, candidate: dict) -> None:
+        self._safely(self.journal.record_candidate, self.task_id, candidate)
+
+    def record_variation(self, hashtag: str, country: str, page_stats: Dict) -> None:
+        # Only a feed collected to its end is skipped on resume; a page cut short is revisited
+        if page_stats.get("exhausted"):
+            self._safely(self.journal.record_variation, self.task_id, hashtag, country)
+
+    def record_result(self, candidate: dict, saved) -> None:
+        self._safely(self.journal.record_processed, self.task_id, candidate["profile_link"], saved)
+
+    def _safely(self, write, *args) -> None:
+        # A journal write failure must never fail the scrape itself
+        try:
+            write(*args)
+        except Exception as e:
+            logger.warning(f"Could not write task checkpoint for {self.task_id}: {e}")
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_task_journal() -> TaskJournal:
+    """Get the process-wide task journal, opening it on first use"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = TaskJournal()
+        return _journal
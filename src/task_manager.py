@@ -45,6 +45,22 @@ class TaskManager:
             else:
                 logger.warning(f"Attempted to update non-existent task: {task_id}")
     
+    def mark_queued(self, task_id: str, task_info: Dict[str, Any]) -> bool:
+        """
+        Mark a task as queued, adding it with task_info if unknown.
+        Returns False, changing nothing, if the task is already queued or running.
+        """
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                self.tasks[task_id] = TaskInfo(**task_info)
+            elif task.status in ("queued", "running"):
+                return False
+            else:
+                task.status = "queued"
+            logger.info(f"Task {task_id} status updated to: queued")
+            return True
+    
     def get_task_status(self, task_id: str) -> Optional[TaskInfo]:
         """Get the status of a specific task"""
         with self.lock:
@@ -64,13 +80,18 @@ class TaskManager:
                 return True
             return False
     
-    def add_to_queue(self, task_id: str, hashtag: str, num_profiles: int, priority: int = 1) -> None:
+    def add_to_queue(self, task_id: str, hashtag: str, num_profiles: int, priority: int = 1,
+                     profile_tabs: Optional[int] = None, refresh: Optional[bool] = None,
+                     resume: bool = False) -> None:
         """Add a task to the priority queue"""
         queue_item = TaskQueueItem(
             task_id=task_id,
             hashtag=hashtag,
             num_profiles=num_profiles,
-            priority=priority
+            priority=priority,
+            profile_tabs=profile_tabs,
+            refresh=refresh,
+            resume=resume
         )
         # Lower priority number = higher priority (queue.get() returns lowest)
         self.task_queue.put((priority, time.time(), queue_item))
@@ -0,0 +1,188 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional
+
+from src.airtable import get_existing_usernames, modified_since_timestamp, SYNC_OVERLAP_SECONDS
+from src.utils import data_file_path, parse_airtable_time
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+USERNAME_INDEX_DB = os.getenv("USERNAME_INDEX_DB", "usernames.db")
+USERNAME_INDEX_SYNC_MINUTES = int(os.getenv("USERNAME_INDEX_SYNC_MINUTES", "10"))  # Incremental pull interval
+USERNAME_INDEX_FULL_SYNC_HOURS = int(os.getenv("USERNAME_INDEX_FULL_SYNC_HOURS", "24"))  # Picks up deletions
+
+
+class UsernameIndex:
+    """
+    Local on-disk index of the usernames already in Airtable, shared by all tasks.
+
+    The first sync downloads the Username field of every record; later syncs
+    only fetch records modified since the previous one. A scheduler job syncs
+    every USERNAME_INDEX_SYNC_MINUTES, and every USERNAME_INDEX_FULL_SYNC_HOURS
+    a full sync replaces the set, so profiles deleted in Airtable are scraped
+    again. Scrapers record usernames as they save profiles, so the index stays
+    current between syncs. Lookups are single indexed SQLite queries, and a
+    task only syncs an index that was never seeded, so it starts without
+    touching Airtable.
+
+    Each row also keeps a hash of the REFRESH_FIELDS values last written
+    (fields_hash) and when the profile was last scraped (refreshed_at,
+    initially the record's creation time), which refresh mode uses to pick
+    stale profiles and skip unchanged writes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_file_path(USERNAME_INDEX_DB)
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS usernames (
+                                 username TEXT PRIMARY KEY, refreshed_at REAL, fields_hash TEXT
+                             ) WITHOUT ROWID""")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.commit()
+
+    def __contains__(self, username) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM usernames WHERE username = ?", (username,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM usernames").fetchone()[0]
+
+    def record(self, username: str, fields_hash: Optional[str] = None) -> None:
+        """Record a profile that was just scraped, with the hash of the fields now in Airtable"""
+        with self.lock:
+            self.conn.execute(
+                """INSERT INTO usernames (username, refreshed_at, fields_hash) VALUES (?, ?, ?)
+                   ON CONFLICT(username) DO UPDATE SET refreshed_at = excluded.refreshed_at,
+                                                       fields_hash = excluded.fields_hash""",
+                (username, time.time(), fields_hash)
+            )
+            self.conn.commit()
+
+    def fields_hash(self, username: str) -> Optional[str]:
+        """Hash of the fields last written for a username, or None if unknown (e.g. only synced from Airtable)"""
+        with self.lock:
+            row = self.conn.execute("SELECT fields_hash FROM usernames WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, username: str, max_age: float) -> bool:
+        """Whether a username is known and was scraped less than max_age seconds ago"""
+        with self.lock:
+            row = self.conn.execute("SELECT refreshed_at FROM usernames WHERE username = ?", (username,)).fetchone()
+        return row is not None and row[0] is not None and time.time() - row[0] < max_age
+
+    def _meta(self, key: str) -> Optional[float]:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM index_meta WHERE key = ?", (key,)).fetchone()
+        return float(row[0]) if row else None
+
+    def last_synced(self) -> Optional[float]:
+        """Unix time of the last successful sync, or None if the index was never seeded"""
+        return self._meta("last_synced")
+
+    def sync(self, full: bool = False) -> int:
+        """
+        Pull usernames from Airtable: everything on the first run, when `full`
+        or every USERNAME_INDEX_FULL_SYNC_HOURS, else only records modified
+        since the last sync. A full sync drops usernames no longer in Airtable.
+
+        Returns:
+            int: Number of usernames fetched
+        """
+        with self.sync_lock:
+            last_synced = self.last_synced()
+            last_full = self._meta("last_full_sync")
+            started_at = time.time()
+            full = (full or last_synced is None or last_full is None
+                    or started_at - last_full >= USERNAME_INDEX_FULL_SYNC_HOURS * 3600)
+
+            modified_since = None if full else modified_since_timestamp(last_synced)
+
+            profiles = get_existing_usernames(modified_since=modified_since)
+            with self.lock:
+                self.conn.executemany(
+                    """INSERT INTO usernames (username, refreshed_at) VALUES (?, ?)
+                       ON CONFLICT(username) DO UPDATE SET
+                           refreshed_at = COALESCE(usernames.refreshed_at, excluded.refreshed_at)""",
+                    ((p["username"], parse_airtable_time(p["created_time"])) for p in profiles)
+                )
+                if full:
+                    # Usernames no longer in Airtable were deleted there; ones the scrapers
+                    # recorded while the pull was running are kept
+                    self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_usernames (username TEXT PRIMARY KEY)")
+                    self.conn.execute("DELETE FROM seen_usernames")
+                    self.conn.executemany("INSERT OR IGNORE INTO seen_usernames VALUES (?)",
+                                          ((p["username"],) for p in profiles))
+                    self.conn.execute(
+                        """DELETE FROM usernames WHERE username NOT IN (SELECT username FROM seen_usernames)
+                           AND (refreshed_at IS NULL OR refreshed_at < ?)""",
+                        (started_at - SYNC_OVERLAP_SECONDS,)
+                    )
+                    self.conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('last_full_sync', ?)",
+                                      (str(started_at),))
+                self.conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('last_synced', ?)",
+                                  (str(started_at),))
+                self.conn.commit()
+
+            kind = "Full" if full else "Incremental"
+            logger.info(f"🗂️ {kind} username index sync: {len(profiles)} usernames fetched "
+                        f"in {time.time() - started_at:.2f}s")
+            return len(profiles)
+
+    def refresh(self, max_age: float = USERNAME_INDEX_SYNC_MINUTES * 60) -> None:
+        """
+        Sync when the index is older than max_age seconds. A failed refresh keeps
+        the existing index; only a failed first seed is raised.
+        """
+        last_synced = self.last_synced()
+        if last_synced is not None and time.time() - last_synced < max_age:
+            return
+        try:
+            self.sync()
+        except Exception as e:
+            if last_synced is None:
+                raise
+            logger.warning(f"⚠️ Username index refresh failed, using index from "
+                           f"{time.time() - last_synced:.0f}s ago: {e}")
+
+    def ensure_seeded(self) -> None:
+        """Seed the index if it was never synced; a seeded index is left to the scheduled sync"""
+        self.refresh(max_age=float("inf"))
+
+
+class FreshUsernames:
+    """
+    Membership view of a UsernameIndex for refresh mode: a username only counts
+    as known while it was scraped less than max_age seconds ago, so stale
+    profiles are collected again instead of skipped.
+    """
+
+    def __init__(self, index: UsernameIndex, max_age: float):
+        self.index = index
+        self.max_age = max_age
+
+    def __contains__(self, username) -> bool:
+        return self.index.is_fresh(username, self.max_age)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_username_index() -> UsernameIndex:
+    """Get the process-wide username index, opening it on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = UsernameIndex()
+        return _index
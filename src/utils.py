@@ -1,3 +1,8 @@
+import os
+from datetime import datetime
+from typing import Optional
+
+
 def parse_count(count_str: str) -> int:
     """
     Convert TikTok-style count strings to integer.
@@ -43,6 +48,26 @@ def format_count(count_int: int) -> str:
         return str(count_int)
 
 
+def data_file_path(filename: str) -> str:
+    """
+    Path of a local state file (SQLite stores, journals) under SCRAPER_DATA_DIR.
+    The directory is created on first use.
+    """
+    data_dir = os.getenv("SCRAPER_DATA_DIR", "data")
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, filename)
+
+
+def parse_airtable_time(value: Optional[str]) -> Optional[float]:
+    """Convert an Airtable timestamp like '2024-05-01T12:00:00.000Z' to Unix time"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
 if __name__ =="__main__":
     print("converting to int figure: ",parse_count("78.1M"))
 
@@ -0,0 +1,130 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.utils import data_file_path
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+VARIATION_STATS_DB = os.getenv("VARIATION_STATS_DB", "variation_stats.db")
+DEAD_AFTER_RUNS = int(os.getenv("VARIATION_DEAD_AFTER_RUNS", "3"))  # Empty runs in a row before a variant is skipped
+REPROBE_AFTER_DAYS = float(os.getenv("VARIATION_REPROBE_DAYS", "7"))  # Dead variants are retried after this long
+HISTORY_RUNS = 5  # Recent runs used to estimate a variant's yield
+
+
+class VariationStatsStore:
+    """
+    Persistent per-variation yield history used to plan hashtag collection.
+
+    Every collected hashtag page records cards seen, new and known profiles,
+    scrolls and time spent. plan() then orders variations by expected new
+    profiles per second and skips variants that were exhausted without a
+    single new profile in each of their last DEAD_AFTER_RUNS runs, until they
+    are due for a re-probe.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_file_path(VARIATION_STATS_DB)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS variation_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                base_hashtag TEXT NOT NULL,
+                hashtag TEXT NOT NULL,
+                country TEXT,
+                run_at REAL NOT NULL,
+                cards_seen INTEGER NOT NULL,
+                new_profiles INTEGER NOT NULL,
+                known_profiles INTEGER NOT NULL,
+                scroll_count INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                exhausted INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_variation_runs_hashtag ON variation_runs (base_hashtag, hashtag, run_at)"
+        )
+        self.conn.commit()
+
+    def record(self, base_hashtag: str, hashtag: str, country: str, stats: Dict) -> None:
+        """Store the yield of one hashtag page, as returned by get_unique_profiles_via_videos"""
+        with self.lock:
+            self.conn.execute(
+                """INSERT INTO variation_runs (base_hashtag, hashtag, country, run_at, cards_seen, new_profiles,
+                                               known_profiles, scroll_count, seconds, exhausted)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (base_hashtag.lower(), hashtag.lower(), country, time.time(), stats.get("cards_seen", 0),
+                 stats.get("new_profiles", 0), stats.get("known_profiles", 0), stats.get("scroll_count", 0),
+                 stats.get("seconds", 0.0), int(stats.get("exhausted", True)))
+            )
+            self.conn.commit()
+
+    def recent_runs(self, base_hashtag: str, hashtag: str, limit: int = HISTORY_RUNS) -> List[sqlite3.Row]:
+        """Get the most recent runs of a variation, newest first"""
+        with self.lock:
+            cursor = self.conn.execute(
+                """SELECT run_at, new_profiles, seconds, exhausted FROM variation_runs
+                   WHERE base_hashtag = ? AND hashtag = ? ORDER BY run_at DESC LIMIT ?""",
+                (base_hashtag.lower(), hashtag.lower(), limit)
+            )
+            return cursor.fetchall()
+
+    def is_dead(self, runs, dead_after: int = DEAD_AFTER_RUNS) -> bool:
+        """A variant is dead when its last `dead_after` runs ran out of feed without a new profile"""
+        recent = runs[:dead_after]
+        return len(recent) >= dead_after and all(exhausted and new == 0 for _, new, _, exhausted in recent)
+
+    def plan(self, base_hashtag: str, variations: List[Tuple[str, str]],
+             dead_after: int = DEAD_AFTER_RUNS, reprobe_after_days: float = REPROBE_AFTER_DAYS):
+        """
+        Order (hashtag, country) variations by expected new profiles per second.
+
+        Variations without history come first so they get measured. Dead
+        variations are dropped unless their last run is older than
+        reprobe_after_days, in which case they are retried last.
+        """
+        now = time.time()
+        untried, scored, reprobes = [], [], []
+        skipped = 0
+
+        for hashtag, country in variations:
+            runs = self.recent_runs(base_hashtag, hashtag, max(HISTORY_RUNS, dead_after))
+            if not runs:
+                untried.append((hashtag, country))
+                continue
+
+            if self.is_dead(runs, dead_after):
+                if now - runs[0][0] >= reprobe_after_days * 86400:
+                    reprobes.append((hashtag, country))
+                else:
+                    skipped += 1
+                continue
+
+            history = runs[:HISTORY_RUNS]
+            total_new = sum(new for _, new, _, _ in history)
+            total_seconds = sum(seconds for _, _, seconds, _ in history)
+            scored.append((total_new / max(total_seconds, 1.0), hashtag, country))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        ordered = untried + [(hashtag, country) for _, hashtag, country in scored] + reprobes
+        logger.info(f"📈 Planned {len(ordered)} variations for {base_hashtag} "
+                    f"({len(untried)} untried, {len(reprobes)} re-probes, {skipped} dead skipped)")
+        return ordered
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_variation_stats_store() -> VariationStatsStore:
+    """Get the process-wide variation stats store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = VariationStatsStore()
+        return _store
@@ -223,6 +223,1041 @@ def test_schemas():
     except Exception as e:
         print(f"❌ Schema validation failed: {e}")
 
+def test_http_fetcher_offline():
+    """Test the browserless profile engine against a local fixture server"""
+    print("\n🌐 Testing HTTP profile fetcher (offline)...")
+
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from src.http_fetcher import HttpProfileFetcher
+
+    state = {
+        "__DEFAULT_SCOPE__": {
+            "webapp.user-detail": {
+                "userInfo": {
+                    "user": {"uniqueId": "fixture_user", "signature": "Travel vlogs", "avatarLarger": "https://img/a.jpg"},
+                    "stats": {"followerCount": 48712, "heartCount": 9818}
+                }
+            }
+        }
+    }
+    captcha_state = json.loads(json.dumps(state))
+    captcha_user = captcha_state["__DEFAULT_SCOPE__"]["webapp.user-detail"]["userInfo"]["user"]
+    captcha_user.update(uniqueId="captcha_fan", signature="I solve every captcha")
+    pages = {
+        "/@fixture_user": (200, '<html><script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">'
+                                f'{json.dumps(state)}</script></html>'),
+        # Real profile whose bio trips a challenge marker: the state wins
+        "/@captcha_fan": (200, '<html><script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">'
+                               f'{json.dumps(captcha_state)}</script></html>'),
+        # Serves another user's state (e.g. a redirect): must not be saved under this username
+        "/@renamed_user": (200, '<html><script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">'
+                                f'{json.dumps(state)}</script></html>'),
+        "/@challenged": (200, '<html><div id="tiktok-verify-page">captcha</div></html>'),
+        "/@blocked": (403, "Forbidden"),
+    }
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body = pages.get(self.path, (404, "Not found"))
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        candidates = [
+            {"profile_link": f"{base}/@{name}", "username": name, "country": "uk"}
+            for name in ("fixture_user", "captcha_fan", "renamed_user", "challenged", "blocked")
+        ]
+        profiles, escalated = [], []
+        HttpProfileFetcher(proxy="", http2=False).run_sync(
+            candidates, "Travel",
+            on_profile=lambda candidate, profile: profiles.append(profile),
+            on_escalate=lambda candidate: escalated.append(candidate["username"])
+        )
+
+        assert sorted(p.Username for p in profiles) == ["captcha_fan", "fixture_user"]
+        profiles.sort(key=lambda p: p.Username != "fixture_user")
+        assert profiles[0].Followers == 48712 and profiles[0].Likes == 9818
+        assert profiles[0].Country == "UK" and profiles[0].Hashtag == "travel"
+        assert sorted(escalated) == ["blocked", "challenged", "renamed_user"]
+        print(f"✅ Parsed {len(profiles)} profiles, escalated {len(escalated)} challenge pages")
+
+        # A profile whose save fails goes to the browser path instead of vanishing
+        def failing_save(candidate, profile):
+            raise RuntimeError("database is locked")
+
+        escalated = []
+        HttpProfileFetcher(proxy="", http2=False).run_sync(
+            candidates[:1], "Travel", on_profile=failing_save,
+            on_escalate=lambda candidate: escalated.append(candidate["username"])
+        )
+        assert escalated == ["fixture_user"]
+        print("✅ Profile with a failed save was escalated to the browser")
+    finally:
+        server.shutdown()
+
+def test_resume_queues_once():
+    """Test that resuming a task that is already queued does not queue it again"""
+    print("\n⏯️ Testing task resume deduplication...")
+
+    from src.api import queue_resumed_task
+    from src.task_manager import task_manager, generate_task_id
+
+    task_id = generate_task_id()
+    before = task_manager.queue_size()
+    assert queue_resumed_task(task_id, "travel", 10, {})
+    assert not queue_resumed_task(task_id, "travel", 10, {})
+    assert task_manager.queue_size() == before + 1
+
+    # Drop the test task so nothing else picks it up
+    while (item := task_manager.get_from_queue()) is not None and item.task_id != task_id:
+        pass
+    task_manager.remove_task(task_id)
+    print("✅ Second resume of a queued task was rejected")
+
+def test_refresh_skips_only_unchanged_profiles():
+    """Test that a refresh is only skipped when none of the refreshed fields changed"""
+    print("\n🔄 Testing refresh change detection...")
+
+    import tempfile
+    from unittest import mock
+    from src.schemas import Profile
+    from src.username_index import UsernameIndex
+    from src import tikTok_Scraper
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = UsernameIndex(os.path.join(tmp, "usernames.db"))
+        writes, results = [], []
+        writer = mock.Mock(submit=lambda fields, callback, tag=None: (writes.append(fields), callback({"id": "rec1"})))
+        profile = Profile(Username="bio_changer", Bio="Old bio", Followers=10, Likes=20,
+                          Profile_URL="https://www.tiktok.com/@bio_changer", Country="UK", Hashtag="travel")
+
+        with mock.patch.object(tikTok_Scraper, "get_username_index", return_value=index), \
+             mock.patch.object(tikTok_Scraper, "get_profile_replica"), \
+             mock.patch.object(tikTok_Scraper, "airtable_writer", writer), \
+             mock.patch.object(tikTok_Scraper, "airtable_upsert_writer", writer):
+            on_result = lambda candidate, saved: results.append(saved)
+            tikTok_Scraper.save_scraped_profile({}, profile, on_result)
+            tikTok_Scraper.save_scraped_profile({}, profile, on_result)
+            tikTok_Scraper.save_scraped_profile({}, profile.copy(update={"Bio": "New bio"}), on_result)
+        index.conn.close()
+
+    assert [fields["Bio"] for fields in writes] == ["Old bio", "New bio"]
+    assert len(results) == 3 and all(results)
+    print("✅ Unchanged profile skipped, changed bio written")
+
+def test_resumed_saves_upsert():
+    """Test that profiles replayed from a checkpoint are upserted, so a crash after their save makes no duplicate"""
+    print("\n⏯️ Testing resumed saves...")
+
+    import tempfile
+    from unittest import mock
+    from src.schemas import Profile
+    from src.task_journal import TaskJournal, TaskCheckpoint
+    from src.username_index import UsernameIndex
+    from src import tikTok_Scraper
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TaskJournal(os.path.join(tmp, "journal.db"))
+        index = UsernameIndex(os.path.join(tmp, "usernames.db"))
+        journal.start_task("task1", "travel", 10)
+        journal.record_candidate("task1", {"profile_link": "https://www.tiktok.com/@saved_before_crash",
+                                           "username": "saved_before_crash", "country": "UK"})
+        checkpoint = TaskCheckpoint(journal, "task1", journal.load("task1"))
+        replayed = checkpoint.unprocessed(checkpoint.candidates)
+
+        created, upserted = [], []
+        create_writer = mock.Mock(submit=lambda fields, callback, tag=None: (created.append(fields["Username"]), callback({"id": "rec1"})))
+        upsert_writer = mock.Mock(submit=lambda fields, callback, tag=None: (upserted.append(fields["Username"]), callback({"id": "rec1"})))
+        with mock.patch.object(tikTok_Scraper, "get_username_index", return_value=index), \
+             mock.patch.object(tikTok_Scraper, "get_profile_replica"), \
+             mock.patch.object(tikTok_Scraper, "airtable_writer", create_writer), \
+             mock.patch.object(tikTok_Scraper, "airtable_upsert_writer", upsert_writer):
+            for candidate in replayed + [{"profile_link": "https://www.tiktok.com/@found_after_resume",
+                                          "username": "found_after_resume", "country": "UK"}]:
+                profile = Profile(Username=candidate["username"], Profile_URL=candidate["profile_link"],
+                                  Country="UK", Hashtag="travel")
+                tikTok_Scraper.save_scraped_profile(candidate, profile, lambda candidate, saved: None)
+        journal.conn.close()
+        index.conn.close()
+
+    assert upserted == ["saved_before_crash"]
+    assert created == ["found_after_resume"]
+    print("✅ Replayed profile upserted on Username, newly found profile created")
+
+def test_startup_resumes_after_services():
+    """Test that the app's lifespan resumes interrupted tasks only after the queue processor is started"""
+    print("\n🚦 Testing app startup order...")
+
+    from unittest import mock
+    from fastapi.testclient import TestClient
+    from src import api
+
+    calls = []
+    with mock.patch.object(api, "start_background_services", lambda: calls.append("services")), \
+         mock.patch.object(api, "resume_interrupted_tasks", lambda: calls.append("resume") or 0):
+        with TestClient(api.app):
+            assert calls == ["services", "resume"]
+    print("✅ Interrupted tasks resumed after background services started")
+
+def test_journal_prune_keeps_resumable_tasks():
+    """Test that journal pruning drops old finished tasks but keeps running and recently failed ones"""
+    print("\n🧹 Testing task journal retention...")
+
+    import tempfile
+    from src.task_journal import TaskJournal
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TaskJournal(os.path.join(tmp, "journal.db"))
+        hour = 3600
+        ages = {"completed_old": 25 * hour, "completed_new": hour, "failed_old": 200 * hour,
+                "failed_new": 100 * hour, "running_old": 500 * hour}
+        for task_id, age in ages.items():
+            journal.start_task(task_id, "travel", 10)
+            journal.record_candidate(task_id, {"profile_link": f"https://www.tiktok.com/@{task_id}",
+                                               "username": task_id, "country": "UK"})
+            journal.record_variation(task_id, "travelUK", "UK")
+            journal.record_processed(task_id, f"https://www.tiktok.com/@{task_id}", True)
+            status = task_id.split("_")[0]
+            if status != "running":
+                journal.finish_task(task_id, status)
+            journal.conn.execute("UPDATE journal_tasks SET updated_at = ? WHERE task_id = ?",
+                                 (time.time() - age, task_id))
+        journal.conn.commit()
+
+        assert journal.prune(max_age_hours=24, failed_max_age_hours=168) == 2
+        kept = {"completed_new", "failed_new", "running_old"}
+        for table in ("journal_tasks", "journal_candidates", "journal_variations", "journal_processed"):
+            rows = {row[0] for row in journal.conn.execute(f"SELECT task_id FROM {table}")}
+            assert rows == kept, (table, rows)
+        assert journal.load("failed_new")["processed"] == {"https://www.tiktok.com/@failed_new"}
+        assert [task["task_id"] for task in journal.resumable_tasks()] == ["running_old"]
+        assert journal.prune(max_age_hours=24, failed_max_age_hours=168) == 0
+        journal.conn.close()
+
+    print("✅ Old completed and failed tasks pruned with their rows; resumable ones kept")
+
+def test_endpoint_guard_rejects_and_times_out():
+    """Test that a guard answers 504 for a slow call and 503 while that call still holds its only slot"""
+    print("\n🛡️ Testing endpoint guard limits...")
+
+    import asyncio
+    from fastapi import HTTPException
+    from src.endpoint_guard import EndpointGuard
+
+    guard = EndpointGuard("test endpoint", concurrency=1, timeout=0.3)
+
+    async def status_of(call):
+        try:
+            await call
+        except HTTPException as e:
+            return e.status_code
+        return 200
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        slow = await status_of(guard.run(time.sleep, 1))
+        # The timed-out thread is still sleeping and keeps the only slot
+        busy = await status_of(guard.run(lambda: "fast"))
+        ticking.cancel()
+        await asyncio.sleep(0.6)
+        fast = await guard.run(lambda: "fast")
+        slow_async = await status_of(guard.run_async(lambda: asyncio.sleep(1)))
+        return slow, busy, fast, slow_async, ticks
+
+    slow, busy, fast, slow_async, ticks = asyncio.run(scenario())
+    assert (slow, busy, fast, slow_async) == (504, 503, "fast", 504)
+    assert ticks >= 8, ticks  # The blocking call never stalled the event loop
+    assert guard.get_statistics() == {"in_flight": 0, "limit": 1, "calls": 3, "rejected": 1, "timeouts": 2}
+    guard.executor.shutdown()
+    print("✅ Slow calls got 504, a call with no free slot got 503, the loop kept running")
+
+def test_driver_pool_reuses_and_recycles():
+    """Test driver pool checkout limits, reset on checkin, and recycling of worn-out or broken browsers"""
+    print("\n🚗 Testing driver pool...")
+
+    import threading
+    from types import SimpleNamespace
+    from src.driver_pool import DriverPool
+
+    class FakeBrowser:
+        def __init__(self):
+            self.window_handles = ["main"]
+            self.current = "main"
+            self.cdp, self.visited = [], []
+            self.healthy, self.quit_called = True, False
+            self.switch_to = SimpleNamespace(window=lambda handle: setattr(self, "current", handle))
+
+        def get(self, url):
+            self.visited.append(url)
+
+        def close(self):
+            self.window_handles.remove(self.current)
+
+        def execute_script(self, script):
+            if not self.healthy:
+                raise RuntimeError("chrome not reachable")
+            return 1
+
+        def execute_cdp_cmd(self, cmd, params):
+            self.cdp.append(cmd)
+
+        def quit(self):
+            self.quit_called = True
+
+    browsers = []
+    pool = DriverPool(lambda: browsers.append(FakeBrowser()) or browsers[-1], max_size=2, max_pages=3)
+
+    first, second = pool.checkout(), pool.checkout()
+    assert pool.checkout(timeout=0.1) is None  # Both browsers are in use
+
+    # A used browser comes back reset: extra tabs closed, cookies and storage cleared
+    first._driver.window_handles.append("profile-tab")
+    first.get("https://www.tiktok.com/@someone")
+    first.quit()  # Callers' quit() is ignored for pooled drivers
+    pool.checkin(first)
+    assert first._driver.window_handles == ["main"] and not first._driver.quit_called
+    assert "Network.clearBrowserCookies" in first._driver.cdp and first._driver.visited[-1] == "about:blank"
+    assert pool.checkout() is first  # Reused, not relaunched
+
+    # A checkin wakes a task waiting for a browser
+    waiter = {}
+    thread = threading.Thread(target=lambda: waiter.update(driver=pool.checkout(timeout=5)))
+    thread.start()
+    time.sleep(0.1)
+    second._driver.healthy = False
+    pool.checkin(second)  # Broken: quit and replaced by a fresh browser for the waiter
+    thread.join()
+    assert second._driver.quit_called and waiter["driver"]._driver is browsers[2]
+
+    for _ in range(3):
+        first.get("https://www.tiktok.com/@another")
+    pool.checkin(first)  # Past max_pages: recycled
+    assert first._driver.quit_called
+
+    # An idle browser that died while parked is discarded at checkout
+    pool.checkin(waiter["driver"])
+    browsers[2].healthy = False
+    replacement = pool.checkout()
+    assert replacement._driver is browsers[3] and browsers[2].quit_called
+    pool.checkin(replacement)
+    pool.shutdown()
+
+    assert browsers[3].quit_called
+    stats = pool.get_statistics()
+    assert (stats["created"], stats["recycled"], stats["unhealthy"], stats["idle"], stats["in_use"]) == (4, 2, 1, 0, 0)
+    print("✅ Browsers reused after reset, recycled when worn out or broken, waiters woken")
+
+def test_profile_export_formats():
+    """Test that /profiles/export streams every matching replica row as NDJSON or CSV"""
+    print("\n📤 Testing profile export...")
+
+    import csv
+    import json
+    import tempfile
+    from unittest import mock
+    from fastapi.testclient import TestClient
+    from src import api
+    from src.profile_replica import ProfileReplica
+
+    with tempfile.TemporaryDirectory() as tmp:
+        replica = ProfileReplica(os.path.join(tmp, "profiles.db"))
+        replica.upsert_records([
+            {"id": f"rec{i}", "createdTime": "2026-01-01T00:00:00.000Z",
+             "fields": {"Username": f"user_{i}", "Bio": f'Says "hi", {i} times\ndaily', "Followers": i,
+                        "Hashtag": "travel" if i % 3 else "food", "Country": "UK"}}
+            for i in range(1200)
+        ])
+        replica.conn.execute("INSERT OR REPLACE INTO replica_meta VALUES ('last_full_sync', ?)", (str(time.time()),))
+        replica.conn.commit()
+
+        # Without a `with` block the client skips the lifespan, so no background services start
+        client = TestClient(api.app)
+        with mock.patch.object(api, "get_profile_replica", return_value=replica), \
+             mock.patch.object(api, "EXPORT_CHUNK_BYTES", 4096):
+            ndjson = client.get("/profiles/export", params={"hashtag": "travel", "min_followers": 100})
+            csv_export = client.get("/profiles/export", params={"format": "csv"})
+            trimmed = client.get("/profiles/export", params={"format": "csv", "fields": "Username, Followers",
+                                                              "hashtag": "food"})
+            rejected = client.get("/profiles/export", params={"format": "xml"})
+        replica.conn.close()
+
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert len(rows) == sum(1 for i in range(100, 1200) if i % 3)
+    assert all(row["Hashtag"] == "travel" and row["Followers"] >= 100 for row in rows)
+
+    assert csv_export.headers["content-disposition"] == "attachment; filename=profiles.csv"
+    table = list(csv.reader(csv_export.text.splitlines(keepends=True)))
+    assert table[0] == api.EXPORT_CSV_FIELDS and len(table) == 1201
+    assert table[6][table[0].index("Bio")] == 'Says "hi", 5 times\ndaily'
+
+    trimmed_rows = list(csv.reader(trimmed.text.splitlines()))
+    assert trimmed_rows[0] == ["Username", "Followers"] and len(trimmed_rows) == 401
+    assert trimmed_rows[1] == ["user_0", "0"]
+    assert rejected.status_code == 400
+    print("✅ NDJSON and CSV exports streamed every matching profile, with field selection")
+
+def test_username_index_sync():
+    """Test that the username index seeds once, then pulls increments, and a full sync drops deleted usernames"""
+    print("\n🗂️ Testing username index sync...")
+
+    import tempfile
+    from unittest import mock
+    from src.username_index import UsernameIndex, FreshUsernames
+
+    pulls = []
+    airtable = {"alice": "2020-01-01T00:00:00.000Z", "bob": "2020-01-01T00:00:00.000Z"}
+
+    def fetch(modified_since=None):
+        pulls.append(modified_since)
+        if airtable is None:
+            raise RuntimeError("Airtable unavailable")
+        return [{"username": username, "created_time": created} for username, created in airtable.items()]
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         mock.patch("src.username_index.get_existing_usernames", side_effect=fetch):
+        index = UsernameIndex(os.path.join(tmp, "usernames.db"))
+        index.ensure_seeded()
+        index.ensure_seeded()  # Already seeded: no second pull
+        assert pulls == [None] and "alice" in index and len(index) == 2
+
+        index.record("carol", "hash1")  # Saved by a scraper between syncs
+        del airtable["bob"]
+        airtable["dave"] = "2026-01-01T00:00:00.000Z"
+        index.sync()
+        assert pulls[-1] is not None  # Incremental pull: only modified records
+        assert "bob" in index and "dave" in index
+
+        index.sync(full=True)
+        assert pulls[-1] is None
+        assert "bob" not in index and all(username in index for username in ("alice", "carol", "dave"))
+        assert index.fields_hash("carol") == "hash1" and index.fields_hash("alice") is None
+
+        fresh = FreshUsernames(index, 7 * 86400)
+        assert "carol" in fresh and "alice" not in fresh  # alice was last scraped in 2020
+
+        airtable = None
+        index.refresh(max_age=0)  # A failed refresh keeps the seeded index
+        assert len(index) == 3
+        unseeded = UsernameIndex(os.path.join(tmp, "unseeded.db"))
+        try:
+            unseeded.ensure_seeded()
+            assert False, "expected the failed first seed to raise"
+        except RuntimeError:
+            pass
+        index.conn.close()
+        unseeded.conn.close()
+
+    print("✅ Index seeded once, pulled increments, dropped a deleted username, kept scraper records")
+
+def test_profile_replica_serves_queries():
+    """Test that /profiles reads the replica once seeded, and that syncs pull changes and drop deleted records"""
+    print("\n🗄️ Testing profile replica queries...")
+
+    import tempfile
+    from unittest import mock
+    from fastapi.testclient import TestClient
+    from src import api
+    from src.profile_replica import ProfileReplica
+
+    def record(record_id, hashtag, country, followers, bio=""):
+        return {"id": record_id, "createdTime": "2026-01-01T00:00:00.000Z",
+                "fields": {"Username": f"user_{record_id}", "Bio": bio, "Hashtag": hashtag, "Country": country,
+                           "Followers": followers}}
+
+    airtable = [record("rec1", "Travel", "UK", 500, "Backpacking Europe"), record("rec2", "travel", "usa", 50000),
+                record("rec3", "food", "UK", 20000, "Street food")]
+    with tempfile.TemporaryDirectory() as tmp, mock.patch("src.profile_replica.get_table") as get_table:
+        get_table.return_value.all.side_effect = lambda formula=None: list(airtable)
+        replica = ProfileReplica(os.path.join(tmp, "profiles.db"))
+        client = TestClient(api.app)
+
+        with mock.patch.object(api, "get_profile_replica", return_value=replica), \
+             mock.patch.object(api, "get_table") as live_table:
+            live_table.return_value.all.return_value = [airtable[0]]
+            unseeded = client.get("/profiles", params={"hashtag": "travel"}).json()
+            replica.sync()
+            seeded = client.get("/profiles", params={"hashtag": "TRAVEL", "min_followers": 1000}).json()
+        assert [p["Username"] for p in unseeded["data"]] == ["user_rec1"]  # Live Airtable before the first sync
+        assert [p["Username"] for p in seeded["data"]] == ["user_rec2"] and live_table.return_value.all.call_count == 1
+
+        assert [p["Username"] for p in replica.query(country="uk")] == ["user_rec1", "user_rec3"]
+        assert [p["Username"] for p in replica.query(text="FOOD")] == ["user_rec3"]
+        assert [p["Username"] for p in replica.query(hashtag_contains="trav", limit=1)] == ["user_rec1"]
+
+        # An incremental pull only asks for modified records
+        airtable = [record("rec2", "travel", "usa", 60000)]
+        replica.sync()
+        assert "LAST_MODIFIED_TIME()" in get_table.return_value.all.call_args.kwargs["formula"]
+        assert replica.query(hashtag="travel", min_followers=55000)[0]["Followers"] == 60000
+
+        # A full pull drops rec3 (deleted in Airtable) but keeps a record the scraper created during the pull
+        replica.upsert_records([{"id": "rec4", "createdTime": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                                 "fields": {"Username": "user_rec4"}}])
+        airtable = [record("rec1", "Travel", "UK", 500), record("rec2", "travel", "usa", 60000)]
+        replica.sync(full=True)
+        assert sorted(p["Username"] for p in replica.query()) == ["user_rec1", "user_rec2", "user_rec4"]
+        replica.conn.close()
+
+    print("✅ Endpoint served from the replica once seeded; syncs pulled changes and dropped a deleted record")
+
+def test_api_import_is_lazy():
+    """Test that importing the API builds no Airtable or LLM client, opens no local store and starts no thread"""
+    print("\n💤 Testing lazy initialization...")
+
+    import subprocess
+    import sys
+
+    check = """
+import threading
+from src import api, airtable, llm_query, profile_replica, task_journal, username_index, variation_stats
+from src.driver_pool import driver_pool
+assert airtable._api is None and not airtable._tables
+assert llm_query._llm is None and llm_query._prompt is None and llm_query._query_cache is None
+assert profile_replica._replica is None and task_journal._journal is None
+assert username_index._index is None and variation_stats._store is None
+assert driver_pool.get_statistics()["created"] == 0 and not api.background_services_started
+assert threading.active_count() == 1, threading.enumerate()
+"""
+    result = subprocess.run([sys.executable, "-c", check], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    print("✅ Importing the API touched no client, store or thread")
+
+def test_airtable_session_auth():
+    """Test that the rate-limited Airtable session keeps the token header"""
+    print("\n🔑 Testing Airtable session authentication...")
+
+    from src.airtable import build_api, RateLimitedSession
+
+    api = build_api("patXYZ")
+    assert isinstance(api.session, RateLimitedSession)
+    assert api.session.headers.get("Authorization") == "Bearer patXYZ"
+    print("✅ Rate-limited session sends the Authorization header")
+
+def test_resource_blocking_spares_documents():
+    """Test that blocked URL patterns never match a profile page, even for dotted usernames"""
+    print("\n🚫 Testing resource block patterns...")
+
+    import re
+    from src.tikTok_Scraper import resource_block_patterns, RESOURCE_URL_MARKERS
+
+    # Network.setBlockedURLs wildcards: "*" matches any run of characters, the rest is literal
+    patterns = [re.compile(".*".join(map(re.escape, p.split("*"))))
+                for p in resource_block_patterns(list(RESOURCE_URL_MARKERS))]
+    blocked = lambda url: any(p.fullmatch(url) for p in patterns)
+
+    for username in ("a.b", "the.iconic", "food.gifts", "my.image", "art.svg", "dj.mp4", "x.woff"):
+        for url in (f"https://www.tiktok.com/@{username}", f"https://www.tiktok.com/@{username}?lang=en"):
+            assert not blocked(url), url
+    assert blocked("https://p16-sign-va.tiktokcdn.com/tos-maliva-avt-0068/abc~c5_720x720.jpeg?x-expires=1")
+    assert blocked("https://v16-webapp-prime.tiktok.com/video/tos/abc/?mime_type=video_mp4")
+    assert blocked("https://sf16-website-login.neutral.ttwstatic.com/obj/font/TikTokFont.woff2")
+    print("✅ Profile documents load, CDN images, media and fonts are blocked")
+
+def test_multitab_reads_ready_tabs_first():
+    """Test that multi-tab scraping reads whichever tab is ready instead of waiting on the oldest load"""
+    print("\n🗂️ Testing multi-tab scraping order...")
+
+    from types import SimpleNamespace
+    from unittest import mock
+    from src import tikTok_Scraper
+
+    from selenium.common.exceptions import NoSuchWindowException
+
+    load_seconds = {"slow": 0.8, "fast1": 0.05, "fast2": 0.1, "fast3": 0.05, "challenged": 0.05}
+
+    class FakeTabsDriver:
+        """
+        Tabs whose navigations land after load_seconds; nothing ever blocks.
+        The first navigation to a username in `vanish` closes its tab, as UC
+        mode does when it reopens a challenged page in a new window.
+        """
+        def __init__(self, vanish=()):
+            self.tabs = {"tab0": None}
+            self.opened = 1
+            self.vanish = set(vanish)
+            self.blocked_url_patterns = ["*://*.tiktokcdn.com/*"]
+            self.blocked_tabs = {"tab0"}  # get_driver() blocks resources on the first tab
+            self.read_in = {}
+            self.current_window_handle = "tab0"
+            self.switch_to = SimpleNamespace(window=self._switch, new_window=self._new_tab)
+
+        @property
+        def window_handles(self):
+            return list(self.tabs)
+
+        def _switch(self, handle):
+            if handle not in self.tabs:
+                raise NoSuchWindowException(f"no such window: {handle}")
+            self.current_window_handle = handle
+
+        def _new_tab(self, kind):
+            self.current_window_handle = f"tab{self.opened}"
+            self.opened += 1
+            self.tabs[self.current_window_handle] = None
+
+        def _tab(self):
+            if self.current_window_handle not in self.tabs:
+                raise NoSuchWindowException(f"no such window: {self.current_window_handle}")
+            return self.tabs[self.current_window_handle]
+
+        def _landed(self):
+            tab = self._tab()
+            return tab if tab and time.monotonic() >= tab[1] else None
+
+        @property
+        def current_url(self):
+            landed = self._landed()
+            return landed[0] if landed else "about:blank"
+
+        def execute_cdp_cmd(self, command, params):
+            if command == "Network.setBlockedURLs":
+                self.blocked_tabs.add(self.current_window_handle)
+
+        def execute_script(self, script, *args):
+            if script == tikTok_Scraper.START_NAVIGATION_JS:
+                username = args[0].rsplit("@", 1)[1]
+                self._tab()
+                if username in self.vanish:
+                    self.vanish.discard(username)
+                    del self.tabs[self.current_window_handle]
+                    return
+                self.tabs[self.current_window_handle] = (args[0], time.monotonic() + load_seconds[username])
+            elif script == tikTok_Scraper.READ_EMBEDDED_STATE_JS:
+                username = self._landed()[0].rsplit("@", 1)[1]
+                self.read_in[username] = self.current_window_handle
+                return json.dumps({"__DEFAULT_SCOPE__": {"webapp.user-detail": {"userInfo": {
+                    "user": {"uniqueId": username}, "stats": {"followerCount": 1, "heartCount": 2}}}}})
+            elif "readyState" in script:
+                return "complete" if self._landed() else "loading"
+
+        def close(self):
+            del self.tabs[self.current_window_handle]
+
+    def scrape(driver, names):
+        order = []
+        candidates = [{"profile_link": f"https://www.tiktok.com/@{name}", "username": name, "country": "uk"}
+                      for name in names]
+        with mock.patch.object(tikTok_Scraper, "save_scraped_profile",
+                               lambda candidate, profile, on_result: on_result(candidate, profile.dict())):
+            tikTok_Scraper.scrape_candidates_multitab(
+                driver, candidates, "travel",
+                on_result=lambda candidate, saved: order.append(saved and saved["Username"]), tabs=3
+            )
+        return order
+
+    order = scrape(FakeTabsDriver(), ("slow", "fast1", "fast2", "fast3"))
+    assert sorted(order) == ["fast1", "fast2", "fast3", "slow"], order
+    assert order[-1] == "slow", order
+    print(f"✅ Tabs read as they became ready: {', '.join(order)}")
+
+    # A tab closed under the poller: its candidate is loaded again in a new, blocked tab
+    driver = FakeTabsDriver(vanish={"challenged"})
+    order = scrape(driver, ("fast1", "challenged", "fast2", "fast3"))
+    assert sorted(order) == ["challenged", "fast1", "fast2", "fast3"], order
+    assert set(driver.read_in.values()) <= driver.blocked_tabs, (driver.read_in, driver.blocked_tabs)
+    assert driver.window_handles == ["tab0"] and driver.current_window_handle == "tab0"
+    print("✅ Candidate of a vanished tab was scraped again in a new tab with resource blocking")
+
+def test_variation_stats_planning():
+    """Test that variation planning orders by past yield and skips dead variants, without a browser"""
+    print("\n📈 Testing variation yield planning...")
+
+    import tempfile
+    from src.variation_stats import VariationStatsStore
+    from src.tikTok_Scraper import generate_country_hashtags
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VariationStatsStore(os.path.join(tmp, "variation_stats.db"))
+        empty_run = {"cards_seen": 40, "new_profiles": 0, "known_profiles": 40, "seconds": 20.0, "exhausted": True}
+        for _ in range(3):
+            store.record("travel", "travelusa", "usa", empty_run)
+            store.record("travel", "travel_usa", "usa", empty_run)
+        store.record("travel", "traveluk", "uk", {"new_profiles": 30, "seconds": 10.0, "exhausted": True})
+        store.record("travel", "travel_uk", "uk", {"new_profiles": 5, "seconds": 10.0, "exhausted": True})
+        # One dead variant has not been tried for two weeks: it is due for a re-probe
+        store.conn.execute("UPDATE variation_runs SET run_at = run_at - 14 * 86400 WHERE hashtag = 'travel_usa'")
+        store.conn.commit()
+
+        variations = [("travelusa", "usa"), ("travel_usa", "usa"), ("travel_uk", "uk"),
+                      ("traveluk", "uk"), ("travelcanada", "canada")]
+        assert store.plan("travel", variations) == [
+            ("travelcanada", "canada"), ("traveluk", "uk"), ("travel_uk", "uk"), ("travel_usa", "usa")
+        ]
+
+        planned = generate_country_hashtags("travel", store)
+        assert ("travelusa", "usa") not in planned and planned[-1] == ("travel_usa", "usa")
+        store.conn.close()
+
+    print("✅ Untried variants first, then by yield; dead variant skipped, stale one re-probed last")
+
+def test_unloaded_hashtag_page_is_not_dead():
+    """Test that hashtag pages which never show a video card do not count toward pruning the variant"""
+    print("\n🧱 Testing variation runs without cards...")
+
+    import tempfile
+    from src.variation_stats import VariationStatsStore, DEAD_AFTER_RUNS
+    from src.tikTok_Scraper import get_unique_profiles_via_videos
+
+    class NoCardsDriver:
+        """A hashtag page stuck on a challenge: no video card ever renders"""
+        current_window_handle = "tab0"
+
+        def get(self, url):
+            pass
+
+        def set_script_timeout(self, seconds):
+            pass
+
+        def execute_async_script(self, script, *args):
+            return {"arrived": False, "atBottom": True, "cards": 0}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VariationStatsStore(os.path.join(tmp, "variation_stats.db"))
+        for _ in range(DEAD_AFTER_RUNS):
+            page_stats = get_unique_profiles_via_videos(NoCardsDriver(), "travelusa", 10, [], "usa", scroll_timeout=0)
+            assert not page_stats["exhausted"] and page_stats["new_profiles"] == 0
+            store.record("travel", "travelusa", "usa", page_stats)
+        assert store.plan("travel", [("travelusa", "usa")]) == [("travelusa", "usa")]
+        store.conn.close()
+
+    print(f"✅ {DEAD_AFTER_RUNS} runs without cards left the variant scheduled")
+
+def test_failing_collector_loses_no_variation():
+    """Test that variations a crashed collector browser picked up are still collected by the others"""
+    print("\n🌐 Testing parallel collection with a crashed browser...")
+
+    import threading
+    from unittest import mock
+    from src import tikTok_Scraper
+
+    class FakeCollectorDriver:
+        def __init__(self, crashed):
+            self.crashed = crashed
+
+        @property
+        def window_handles(self):
+            if self.crashed:
+                raise ConnectionError("chrome not reachable")
+            return ["tab0"]
+
+        def execute_script(self, script):
+            return 1
+
+        def quit(self):
+            pass
+
+    crashed_driver = FakeCollectorDriver(crashed=True)
+    visited, failed = [], threading.Event()
+
+    def fake_collect(driver, hashtag, num_profiles, candidates, country, **kwargs):
+        if driver.crashed:
+            failed.set()
+            raise ConnectionError("chrome not reachable")
+        failed.wait(2)  # Let the crashed browser take (and fail) a variation first
+        visited.append(hashtag)
+        return {"cards_seen": 0, "new_profiles": 0, "known_profiles": 0, "scroll_count": 0, "seconds": 0.0,
+                "exhausted": True}
+
+    variations = [(f"travel{country}", country) for country in ("usa", "uk", "canada", "japan", "brazil")]
+    with mock.patch.object(tikTok_Scraper, "get_driver", return_value=crashed_driver), \
+         mock.patch.object(tikTok_Scraper, "get_unique_profiles_via_videos", fake_collect):
+        tikTok_Scraper.collect_candidates(FakeCollectorDriver(crashed=False), variations,
+                                          tikTok_Scraper.CandidateSet(100), "travel", set(), workers=2)
+
+    assert failed.is_set()
+    assert sorted(visited) == sorted(hashtag for hashtag, _ in variations), visited
+    print(f"✅ All {len(variations)} variations collected after one browser crashed")
+
+def test_batch_writer_under_load():
+    """Test that concurrent saves go out in rate-limited batches of 10 without losing a record"""
+    print("\n📦 Testing Airtable batch writer under load...")
+
+    import threading
+    from types import SimpleNamespace
+    from src.airtable import TokenBucket
+    from src.airtable_writer import AirtableBatchWriter
+
+    bucket = TokenBucket(rate=100, burst=1)
+
+    class FakeTable:
+        """Sends through the shared bucket like the real session; rejects the whole batch holding a bad record"""
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.sent_at, self.batch_sizes, self.next_id = [], [], 0
+
+        def _send(self, fields_list):
+            bucket.acquire()
+            with self.lock:
+                self.sent_at.append(time.monotonic())
+                self.batch_sizes.append(len(fields_list))
+                if any(fields["Username"] == "bad" for fields in fields_list):
+                    error = RuntimeError("INVALID_VALUE_FOR_COLUMN")
+                    error.response = SimpleNamespace(status_code=422)
+                    raise error
+                self.next_id += len(fields_list)
+                return [{"id": f"rec{self.next_id - i}", "fields": fields} for i, fields in enumerate(fields_list)]
+
+        def batch_create(self, fields_list):
+            return self._send(fields_list)
+
+        def create(self, fields):
+            return self._send([fields])[0]
+
+    table = FakeTable()
+    writer = AirtableBatchWriter(target_table=table, flush_seconds=0.05)
+    results, results_lock = {}, threading.Lock()
+
+    def saved(username, record):
+        with results_lock:
+            results[username] = record
+
+    def submitter(n):
+        for i in range(50):
+            username = "bad" if (n, i) == (3, 17) else f"user_{n}_{i}"
+            writer.submit({"Username": username}, lambda record, username=username: saved(username, record))
+
+    threads = [threading.Thread(target=submitter, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert writer.flush(timeout=30)
+    writer.shutdown()
+
+    assert len(results) == 400
+    assert results["bad"] is None and sum(1 for record in results.values() if record) == 399
+    # One failed batch of 10 is retried record by record; everything else goes out 10 at a time
+    assert max(table.batch_sizes) <= 10 and len(table.batch_sizes) <= 40 + 10, table.batch_sizes
+    # The k-th request is never sent before its token bucket slot
+    first = table.sent_at[0]
+    assert all(sent - first >= k * bucket.interval - 0.002 for k, sent in enumerate(table.sent_at))
+    print(f"✅ 400 saves sent in {len(table.batch_sizes)} requests, spaced by the rate limiter; "
+          f"the invalid record failed alone")
+
+def test_task_flush_waits_for_own_records():
+    """Test that flushing one task's saves does not wait on another task's slow batch"""
+    print("\n📦 Testing per-task writer flush...")
+
+    import threading
+    from src.airtable_writer import AirtableBatchWriter
+
+    release = threading.Event()
+
+    class SlowTable:
+        """Holds back any batch containing the slow task's record until released"""
+        def batch_create(self, fields_list):
+            if any(fields["Username"].startswith("slow") for fields in fields_list):
+                release.wait(10)
+            return [{"id": f"rec_{fields['Username']}", "fields": fields} for fields in fields_list]
+
+    writer = AirtableBatchWriter(target_table=SlowTable(), flush_seconds=0.05)
+    saved = []
+    writer.submit({"Username": "fast_1"}, saved.append, tag="fast_task")
+    writer.submit({"Username": "fast_2"}, saved.append, tag="fast_task")
+    assert writer.flush(timeout=10, tag="fast_task")
+    writer.submit({"Username": "slow_1"}, saved.append, tag="slow_task")
+    time.sleep(0.2)  # Let the slow task's batch go out and stall
+
+    started = time.monotonic()
+    assert writer.flush(timeout=10, tag="fast_task")
+    assert time.monotonic() - started < 0.1
+    assert not writer.flush(timeout=0.3)
+    release.set()
+    assert writer.flush(timeout=10, tag="slow_task")
+    assert writer.pending_by_tag == {}
+    writer.shutdown()
+
+    assert [record["id"] for record in saved] == ["rec_fast_1", "rec_fast_2", "rec_slow_1"]
+    print("✅ Each task's flush waited only for its own records")
+
+def test_replica_aggregates_follow_writes():
+    """Test that trigger-maintained profile aggregates match a full recount after inserts, updates and deletes"""
+    print("\n📊 Testing profile replica aggregates...")
+
+    import tempfile
+    from unittest import mock
+    from src.profile_replica import ProfileReplica, AGGREGATE_DIMENSIONS, PROFILE_STATS_MAX_WINDOW_HOURS
+
+    def record(record_id, hashtag, country, followers):
+        return {"id": record_id, "createdTime": "2026-01-01T00:00:00.000Z",
+                "fields": {"Username": record_id, "Hashtag": hashtag, "Country": country, "Followers": followers}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        replica = ProfileReplica(os.path.join(tmp, "profiles.db"))
+        replica.upsert_records([record("rec1", "travel", "UK", 500), record("rec2", "travel", "USA", 50000),
+                                record("rec3", "food", "UK", 2000000), record("rec4", "food", None, 20000)])
+        # Refreshed counts move rec1 to another follower range; rec2 changes country; rec4 is deleted
+        replica.upsert_records([record("rec1", "travel", "UK", 5000), record("rec2", "travel", "Canada", 50000)])
+        replica.conn.execute("DELETE FROM profiles WHERE record_id = 'rec4'")
+        replica.conn.commit()
+
+        stats = replica.statistics()
+        assert stats["total_profiles"] == 3
+        assert stats["top_hashtags"] == [("travel", 2), ("food", 1)]
+        assert stats["top_countries"] == [("UK", 2), ("Canada", 1)]
+        assert stats["follower_ranges"] == {"0-1K": 0, "1K-10K": 1, "10K-100K": 1, "100K-1M": 0, "1M+": 1}
+
+        incremental = {dimension: replica.aggregate(dimension) for dimension in AGGREGATE_DIMENSIONS}
+        replica.rebuild_aggregates()
+        assert incremental == {dimension: replica.aggregate(dimension) for dimension in AGGREGATE_DIMENSIONS}
+
+        # A sync keeps only the creation hours a /profiles/stats window can reach
+        now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        recent = {"id": "rec5", "createdTime": now, "fields": {"Username": "rec5", "Followers": 10}}
+        with mock.patch("src.profile_replica.get_table") as get_table:
+            get_table.return_value.all.return_value = [record("rec1", "travel", "UK", 5000), recent]
+            replica.sync(full=True)
+        assert [int(key) for key, _ in replica.aggregate("created_hour")] == [int(time.time() // 3600)]
+        assert replica.added_since(PROFILE_STATS_MAX_WINDOW_HOURS) == 1
+        assert replica.statistics()["total_profiles"] == 2
+        replica.conn.close()
+
+    print("✅ Aggregates kept by triggers match a full recount; old creation hours pruned on sync")
+
+def test_llm_cache_single_flight():
+    """Test that concurrent parses of one query call the LLM once, and that failures are not cached"""
+    print("\n🧠 Testing LLM parse cache coalescing...")
+
+    import asyncio
+    import threading
+    from src.llm_cache import QueryCache
+
+    cache = QueryCache("test-version")
+    calls = []
+
+    def compute(query):
+        calls.append(query)
+        time.sleep(0.2)
+        return {"hashtag": "travel"}
+
+    async def acompute(query):
+        return await asyncio.to_thread(compute, query)
+
+    results = []
+    queries = ["travel creators", "Travel  creators", " TRAVEL creators "]
+    threads = [threading.Thread(target=lambda q=q: results.append(cache.get_or_compute(q, compute)))
+               for q in queries * 2]
+    for thread in threads:
+        thread.start()
+
+    async def async_callers():
+        return await asyncio.gather(*(cache.aget_or_compute(q, acompute) for q in queries))
+
+    results.extend(asyncio.run(async_callers()))
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1, calls
+    assert results == [{"hashtag": "travel"}] * 9
+    assert cache.get_statistics()["coalesced"] + cache.get_statistics()["hits"] == 8
+
+    # A failed parse reaches the caller but is not cached: the next call retries
+    def failing(query):
+        raise RuntimeError("LLM unavailable")
+
+    try:
+        cache.get_or_compute("food creators", failing)
+        assert False, "expected the LLM error"
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("food creators", lambda q: {"hashtag": "food"}) == {"hashtag": "food"}
+
+    # The SQLite tier is read and written off the event loop
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.db")
+        QueryCache("test-version", path=path).put("food creators", {"hashtag": "food"})
+        disk_cache = QueryCache("test-version", path=path)
+        disk_threads = []
+        get_disk = disk_cache._get_disk
+        disk_cache._get_disk = lambda key: (disk_threads.append(threading.current_thread()), get_disk(key))[1]
+
+        async def from_disk():
+            loop_thread = threading.current_thread()
+            value = await disk_cache.aget_or_compute("food creators", acompute)
+            return value, loop_thread
+
+        value, loop_thread = asyncio.run(from_disk())
+        assert value == {"hashtag": "food"} and disk_cache.get_statistics()["disk_hits"] == 1
+        assert disk_threads and loop_thread not in disk_threads
+    print("✅ Nine concurrent callers shared one LLM call; a failure was retried; disk reads left the loop")
+
+# Natural-language searches with the filters Gemini returned for them;
+# the first RULE_PARSED entries are simple enough for the rule-based parser
+RULE_PARSED = 10
+QUERY_CORPUS = [
+    ("travel creators in UK with more than 10k followers",
+     {"hashtag": "travel", "country": "UK", "min_followers": 10000}),
+    ("Find travel influencers with more than 50k followers", {"hashtag": "travel", "min_followers": 50000}),
+    ("Show me food bloggers from USA", {"hashtag": "food", "country": "USA"}),
+    ("fitness creators from canada with at least 1M likes",
+     {"hashtag": "fitness", "country": "Canada", "min_likes": 1000000}),
+    ("top 20 #beauty accounts from South Korea", {"hashtag": "beauty", "country": "South Korea", "limit": 20}),
+    ("gaming tiktokers in the United States over 250K followers",
+     {"hashtag": "gaming", "country": "USA", "min_followers": 250000}),
+    ("10 dance creators from Brazil", {"hashtag": "dance", "country": "Brazil", "limit": 10}),
+    ("home decor influencers with 1.5 million followers", {"hashtag": "homedecor", "min_followers": 1500000}),
+    ("British fashion creators with 5k+ followers and 100k+ likes",
+     {"hashtag": "fashion", "country": "UK", "min_followers": 5000, "min_likes": 100000}),
+    ("travel creators with 10k+ followers from us", {"hashtag": "travel", "country": "USA", "min_followers": 10000}),
+    # Beyond the rules: these must be left to the LLM
+    ("cooking profiles tagged recipes", {"hashtag": "recipes"}),
+    ("Get fitness profiles with high engagement", {"hashtag": "fitness", "min_followers": 100000}),
+    ("popular tech reviewers", {"hashtag": "tech", "min_followers": 100000}),
+    ("food creators with less than 5k followers", {"hashtag": "food"}),
+    ("creators from Japan or Korea", {"country": "Japan"}),
+    ("american football creators", {"hashtag": "americanfootball"}),
+    ("top 0 travel creators", {"hashtag": "travel"}),
+    ("top 5000000000000000000000 travel creators", {"hashtag": "travel"}),
+    ("top 1001 travel creators", {"hashtag": "travel"}),
+]
+
+
+def test_rule_parser_corpus():
+    """Test the rule-based query parser against recorded LLM parses"""
+    print("\n📐 Testing rule-based query parser...")
+
+    from src.query_parser import parse_query_rules, RULE_PARSER_MIN_CONFIDENCE, COUNTRY_CODES
+    from src.schemas import ProfileFilters
+
+    def normalized(filters: dict) -> dict:
+        filters = {**ProfileFilters().dict(), **filters}
+        if filters["hashtag"]:
+            filters["hashtag"] = filters["hashtag"].lower().replace(" ", "")
+        if filters["country"]:
+            filters["country"] = COUNTRY_CODES.get(filters["country"].lower(), filters["country"].upper())
+        return filters
+
+    for i, (query, llm_filters) in enumerate(QUERY_CORPUS):
+        filters, confidence = parse_query_rules(query)
+        if i < RULE_PARSED:
+            assert confidence >= RULE_PARSER_MIN_CONFIDENCE, (query, confidence)
+            assert normalized(filters.dict()) == normalized(llm_filters), (query, filters, llm_filters)
+        else:
+            assert confidence < RULE_PARSER_MIN_CONFIDENCE, (query, confidence)
+
+    print(f"✅ Rules matched the LLM on {RULE_PARSED}/{len(QUERY_CORPUS)} queries, deferred the rest")
+
 if __name__ == "__main__":
     print("🚀 TikTok Scraper Modular System Test Suite")
     print("=" * 60)
@@ -232,6 +1267,29 @@ if __name__ == "__main__":
     test_task_manager()
     test_llm_integration()
     test_airtable_integration()
+    test_http_fetcher_offline()
+    test_resume_queues_once()
+    test_refresh_skips_only_unchanged_profiles()
+    test_resumed_saves_upsert()
+    test_startup_resumes_after_services()
+    test_journal_prune_keeps_resumable_tasks()
+    test_endpoint_guard_rejects_and_times_out()
+    test_driver_pool_reuses_and_recycles()
+    test_profile_export_formats()
+    test_username_index_sync()
+    test_profile_replica_serves_queries()
+    test_api_import_is_lazy()
+    test_airtable_session_auth()
+    test_rule_parser_corpus()
+    test_resource_blocking_spares_documents()
+    test_multitab_reads_ready_tabs_first()
+    test_variation_stats_planning()
+    test_unloaded_hashtag_page_is_not_dead()
+    test_failing_collector_loses_no_variation()
+    test_batch_writer_under_load()
+    test_task_flush_waits_for_own_records()
+    test_replica_aggregates_follow_writes()
+    test_llm_cache_single_flight()
     
     # Test API endpoints (only if server is running)
     print("\n" + "=" * 60)